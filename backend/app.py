@@ -1,40 +1,259 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-import pandas as pd
 import os
+import threading
+import time
 from datetime import datetime
+from functools import wraps
 import uuid
-from dateutil import parser
+
+import exporter
+import store
+from lazy_imports import lazy_import
+from sites import DEFAULT_SITE, SITE_HEADER, SiteRegistry, UnknownSite, valid_site_key
+from categorize import classify_device, classify_series
+from overdue import OVERDUE_AFTER_SECONDS, SWEEP_INTERVAL, OverdueIndex, parse_duration, to_epoch, to_iso
+from throttle import SingleFlight, rate_limited
+
+# pandas is only loaded on first use (normally by the background warm-up)
+pd = lazy_import('pandas')
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Snapshot'])
+
+HOST = 'localhost'
+PORT = 5002
 
-# Data file paths
+# Data file names (inside each site's directory)
 DEVICES_FILE = 'devices.csv'
 USERS_FILE = 'users.csv'
 HISTORY_FILE = 'history.csv'
 
+# Per-client limits (requests/second, burst) for the expensive read endpoints
+SEARCH_RATE_LIMIT = (5, 10)
+RECOMMENDATIONS_RATE_LIMIT = (1, 5)
+
+# Identical concurrent reads share one serialization of the same table
+_reads = SingleFlight()
+
+# Reads with this header (or ?snapshot=) are pinned to that snapshot version
+SNAPSHOT_HEADER = 'X-Snapshot'
+
+# Startup timings, reported by GET /metrics/startup
+startup_metrics = {
+    'started_at': time.time(),
+    # Default site's CSV files initialized: data requests are served from here on
+    'ready_seconds': None,
+    # Read caches and indexes loaded
+    'warmup_seconds': None,
+    'time_to_first_response_seconds': None
+}
+_ready = threading.Event()
+_ready.set()
+
 # Initialize CSV files if they don't exist
-def initialize_csv_files():
-    if not os.path.exists(DEVICES_FILE):
+def initialize_csv_files(site):
+    if not os.path.exists(site.devices_file):
         devices_df = pd.DataFrame(columns=[
             'id', 'device_type', 'connectivity', 'serial_number', 'os_version',
             'assigned_user', 'status', 'usage_count', 'check_out_date',
-            'created_at', 'last_updated'
+            'created_at', 'last_updated', 'category', 'check_out_epoch'
         ])
-        devices_df.to_csv(DEVICES_FILE, index=False)
+        devices_df.to_csv(site.devices_file, index=False)
+    else:
+        backfill_devices(site)
     
-    if not os.path.exists(USERS_FILE):
+    if not os.path.exists(site.users_file):
         users_df = pd.DataFrame(columns=[
             'id', 'name', 'email', 'department', 'role', 'status', 'join_date'
         ])
-        users_df.to_csv(USERS_FILE, index=False)
+        users_df.to_csv(site.users_file, index=False)
     
-    if not os.path.exists(HISTORY_FILE):
+    if not os.path.exists(site.history_file):
         history_df = pd.DataFrame(columns=[
             'id', 'device_id', 'user', 'action', 'timestamp'
         ])
-        history_df.to_csv(HISTORY_FILE, index=False)
+        history_df.to_csv(site.history_file, index=False)
+
+def backfill_devices(site):
+    """Fill in derived columns (category, check_out_epoch) for devices written before they existed"""
+    devices_df = pd.read_csv(site.devices_file)
+    changed = False
+    
+    if 'category' not in devices_df.columns:
+        devices_df['category'] = ''
+    missing = devices_df['category'].isna() | (devices_df['category'] == '')
+    if missing.any():
+        devices_df['category'] = devices_df['category'].astype(object)
+        devices_df.loc[missing, 'category'] = classify_series(devices_df.loc[missing, 'device_type'])
+        changed = True
+    
+    # Import scripts wrote check-out dates in mixed formats; store ISO strings plus epoch seconds
+    if 'check_out_epoch' not in devices_df.columns:
+        devices_df['check_out_epoch'] = None
+        changed = True
+    missing = devices_df['check_out_epoch'].isna() & devices_df['check_out_date'].notna()
+    epochs = devices_df.loc[missing, 'check_out_date'].map(to_epoch).dropna()
+    # Unparseable dates keep a blank epoch; rewriting the file for them would repeat on every load
+    if len(epochs):
+        devices_df['check_out_date'] = devices_df['check_out_date'].astype(object)
+        devices_df.loc[epochs.index, 'check_out_date'] = epochs.map(to_iso)
+        devices_df.loc[epochs.index, 'check_out_epoch'] = epochs
+        changed = True
+    
+    if changed:
+        store.write_csv(site.devices_file, devices_df)
+        store.invalidate(site.devices_file)
+
+sites = SiteRegistry(initialize_csv_files, DEVICES_FILE, USERS_FILE, HISTORY_FILE)
+
+def save_devices(devices_df):
+    store.write_csv(g.site.devices_file, devices_df)
+    store.invalidate(g.site.devices_file)
+
+def save_users(users_df):
+    store.write_csv(g.site.users_file, users_df)
+    store.invalidate(g.site.users_file)
+
+def publish_device_event(action, device):
+    """Broadcast a compact status change to /events subscribers"""
+    event = {'type': action}
+    for field in ['id', 'status', 'assigned_user', 'last_updated']:
+        value = device[field]
+        event[field] = str(value) if pd.notna(value) else ''
+    g.site.hub.publish(event)
+
+def warm_up():
+    """Create/backfill the default site's CSV files, then populate its read caches and indexes"""
+    site = None
+    try:
+        site = sites.get(DEFAULT_SITE)
+    except Exception as e:
+        print(f"Error initializing data files: {e}")
+    finally:
+        startup_metrics['ready_seconds'] = time.time() - startup_metrics['started_at']
+        _ready.set()
+    if site is None:
+        return
+    # Requests no longer wait; a request that needs a table first shares its parse
+    try:
+        store.load_devices(site.devices_file)
+        store.load_users(site.users_file)
+        store.maintained_index(site.devices_file, OverdueIndex)
+    except Exception as e:
+        print(f"Error warming caches: {e}")
+    finally:
+        sites.release(site)
+        startup_metrics['warmup_seconds'] = time.time() - startup_metrics['started_at']
+
+def start_background_tasks():
+    """Warm up in the background and start the overdue sweeper (once per server process)"""
+    _ready.clear()
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+    start_overdue_sweeper()
+
+def serve(host=HOST, port=PORT):
+    """Start serving immediately and warm up in the background (no reloader)"""
+    start_background_tasks()
+    app.run(host=host, port=port, threaded=True, use_reloader=False)
+
+@app.before_request
+def wait_until_ready():
+    # Data endpoints need the CSV files initialized; metrics and events don't
+    if request.endpoint not in ('startup_metrics_view', 'device_events'):
+        _ready.wait()
+
+@app.before_request
+def resolve_site():
+    """Select the inventory partition from the X-Site header (or ?site=)"""
+    key = request.headers.get(SITE_HEADER) or request.args.get('site') or DEFAULT_SITE
+    if not valid_site_key(key):
+        return jsonify({'error': 'Invalid site'}), 400
+    try:
+        g.site = sites.get(key)
+    except UnknownSite:
+        return jsonify({'error': f'Unknown site: {key}'}), 404
+    
+    pin = request.headers.get(SNAPSHOT_HEADER) or request.args.get('snapshot')
+    try:
+        g.snapshot_version = int(pin) if pin else None
+    except ValueError:
+        return jsonify({'error': 'Invalid snapshot'}), 400
+
+@app.teardown_request
+def release_site(exc):
+    site = g.pop('site', None)
+    if site is not None:
+        sites.release(site)
+
+@app.after_request
+def record_first_response(response):
+    if startup_metrics['time_to_first_response_seconds'] is None:
+        elapsed = time.time() - startup_metrics['started_at']
+        startup_metrics['time_to_first_response_seconds'] = elapsed
+        print(f"First response after {elapsed:.3f}s")
+    return response
+
+@app.after_request
+def add_snapshot_header(response):
+    snapshot = g.get('snapshot')
+    if snapshot is not None:
+        response.headers[SNAPSHOT_HEADER] = str(snapshot.version)
+    return response
+
+def read_snapshot():
+    """Snapshot this request reads from (pinned or current); None if the pin has expired"""
+    snapshot = g.site.snapshot(g.snapshot_version)
+    g.snapshot = snapshot
+    return snapshot
+
+def snapshot_expired():
+    return jsonify({'error': 'Snapshot expired, re-read without a pinned snapshot'}), 410
+
+def serialized_write(view):
+    """Run a mutation handler under its site's write lock (readers are not blocked)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with g.site.write_lock:
+            return view(*args, **kwargs)
+    return wrapper
+
+def device_record(device):
+    """JSON-safe dict for a device row (blank instead of NaN)"""
+    return device.fillna('').to_dict()
+
+def track_checkout(device):
+    """Keep the overdue index in step with a device's checkout state"""
+    epoch = pd.to_numeric(device['check_out_epoch'], errors='coerce') if device['status'] == 'checked_out' else None
+    epoch = float(epoch) if epoch is not None and pd.notna(epoch) else None
+    store.update_index(g.site.devices_file, OverdueIndex, lambda index: index.track(device['id'], epoch))
+
+def sweep_overdue():
+    """Flag newly overdue devices on every active site by pushing device_overdue events"""
+    cutoff = time.time() - OVERDUE_AFTER_SECONDS
+    for site in sites.active():
+        if not sites.acquire(site):
+            continue
+        try:
+            index = store.maintained_index(site.devices_file, OverdueIndex)
+            for device_id, epoch in index.flag_overdue(cutoff):
+                site.hub.publish({
+                    'type': 'device_overdue',
+                    'id': device_id,
+                    'check_out_date': to_iso(epoch),
+                    'overdue_seconds': time.time() - epoch
+                })
+        except Exception as e:
+            print(f"Error sweeping overdue devices for site {site.key}: {e}")
+        finally:
+            sites.release(site)
+
+def start_overdue_sweeper():
+    def run():
+        while True:
+            sweep_overdue()
+            time.sleep(SWEEP_INTERVAL)
+    threading.Thread(target=run, name='overdue-sweeper', daemon=True).start()
 
 def generate_id():
     return str(uuid.uuid4())
@@ -44,7 +263,7 @@ def get_current_timestamp():
 
 def add_history_record(device_id, user, action):
     try:
-        history_df = pd.read_csv(HISTORY_FILE)
+        history_df = pd.read_csv(g.site.history_file)
         new_record = {
             'id': generate_id(),
             'device_id': device_id,
@@ -53,7 +272,7 @@ def add_history_record(device_id, user, action):
             'timestamp': get_current_timestamp()
         }
         history_df = pd.concat([history_df, pd.DataFrame([new_record])], ignore_index=True)
-        history_df.to_csv(HISTORY_FILE, index=False)
+        store.write_csv(g.site.history_file, history_df)
     except Exception as e:
         print(f"Error adding history record: {e}")
 
@@ -61,17 +280,22 @@ def add_history_record(device_id, user, action):
 @app.route('/devices', methods=['GET'])
 def get_devices():
     try:
-        devices_df = pd.read_csv(DEVICES_FILE)
-        # Replace NaN with None so JSON is valid
-        devices_df = devices_df.fillna('')
-        return jsonify(devices_df.to_dict('records'))
+        snapshot = read_snapshot()
+        if snapshot is None:
+            return snapshot_expired()
+        # Cached table has NaN replaced with '' so JSON is valid
+        table = snapshot.devices
+        category = request.args.get('category')
+        devices_df = store.filter_by_category(table, category) if category else table.df
+        records = _reads.do((request.full_path, id(table)), lambda: devices_df.to_dict('records'))
+        return jsonify(records)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/devices/<device_id>', methods=['GET'])
 def get_device(device_id):
     try:
-        devices_df = pd.read_csv(DEVICES_FILE)
+        devices_df = pd.read_csv(g.site.devices_file)
         device = devices_df[devices_df['id'] == device_id]
         if device.empty:
             return jsonify({'error': 'Device not found'}), 404
@@ -80,20 +304,24 @@ def get_device(device_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/devices/search', methods=['GET'])
+@rate_limited(*SEARCH_RATE_LIMIT)
 def search_devices():
     try:
         query = request.args.get('q', '').lower()
         if not query:
             return jsonify([])
         
-        devices_df = pd.read_csv(DEVICES_FILE)
+        snapshot = read_snapshot()
+        if snapshot is None:
+            return snapshot_expired()
+        devices_df = snapshot.devices.df
         
-        # Case-insensitive fuzzy search
+        # Case-insensitive fuzzy search (device_type/os_version match on their encoded values)
         mask = (
-            devices_df['device_type'].str.lower().str.contains(query, na=False) |
-            devices_df['serial_number'].str.lower().str.contains(query, na=False) |
-            devices_df['assigned_user'].str.lower().str.contains(query, na=False) |
-            devices_df['os_version'].str.lower().str.contains(query, na=False)
+            store.contains(devices_df['device_type'], query) |
+            store.contains(devices_df['serial_number'], query) |
+            store.contains(devices_df['assigned_user'], query) |
+            store.contains(devices_df['os_version'], query)
         )
         
         results = devices_df[mask]
@@ -101,7 +329,29 @@ def search_devices():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/devices/overdue', methods=['GET'])
+def get_overdue_devices():
+    try:
+        try:
+            older_than = parse_duration(request.args['older_than']) if request.args.get('older_than') else OVERDUE_AFTER_SECONDS
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        now = time.time()
+        overdue = store.maintained_index(g.site.devices_file, OverdueIndex).older_than(now - older_than)
+        devices = store.load_devices(g.site.devices_file)
+        results = []
+        for device_id, epoch in overdue:
+            if device_id in devices.by_id:
+                device = devices.df.iloc[devices.by_id[device_id]].to_dict()
+                device['overdue_seconds'] = now - epoch
+                results.append(device)
+        return jsonify(results)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/devices', methods=['POST'])
+@serialized_write
 def add_device():
     try:
         data = request.get_json()
@@ -112,12 +362,15 @@ def add_device():
             if field not in data or not data[field]:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        devices_df = pd.read_csv(DEVICES_FILE)
+        devices_df = pd.read_csv(g.site.devices_file)
         
         # Check for duplicate serial number
         if not devices_df.empty and data['serial_number'] in devices_df['serial_number'].values:
             return jsonify({'error': 'Serial number already exists'}), 400
         
+        # Normalize the check-out date to ISO and epoch seconds
+        check_out_epoch = to_epoch(data.get('check_out_date', ''))
+        
         # Create new device
         new_device = {
             'id': generate_id(),
@@ -128,25 +381,30 @@ def add_device():
             'assigned_user': data.get('assigned_user', ''),
             'status': data.get('status', 'available'),
             'usage_count': data.get('usage_count', 0),
-            'check_out_date': data.get('check_out_date', ''),
+            'check_out_date': to_iso(check_out_epoch) if check_out_epoch is not None else '',
             'created_at': get_current_timestamp(),
-            'last_updated': get_current_timestamp()
+            'last_updated': get_current_timestamp(),
+            'category': classify_device(data['device_type']),
+            'check_out_epoch': check_out_epoch if check_out_epoch is not None else ''
         }
         
         devices_df = pd.concat([devices_df, pd.DataFrame([new_device])], ignore_index=True)
-        devices_df.to_csv(DEVICES_FILE, index=False)
+        save_devices(devices_df)
         
+        track_checkout(new_device)
         add_history_record(new_device['id'], 'system', 'device_created')
+        publish_device_event('device_created', new_device)
         
         return jsonify(new_device), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/devices/<device_id>', methods=['PUT'])
+@serialized_write
 def update_device(device_id):
     try:
         data = request.get_json()
-        devices_df = pd.read_csv(DEVICES_FILE)
+        devices_df = pd.read_csv(g.site.devices_file)
         
         device_idx = devices_df[devices_df['id'] == device_id].index
         if len(device_idx) == 0:
@@ -160,26 +418,38 @@ def update_device(device_id):
         
         # Update fields
         for field in data:
-            if field in devices_df.columns and field not in ['id', 'created_at']:
+            if field in devices_df.columns and field not in ['id', 'created_at', 'category', 'check_out_epoch']:
                 devices_df.loc[device_idx[0], field] = data[field]
         
+        # Category is derived from the device type, so only reclassify when it changes
+        if 'device_type' in data:
+            devices_df.loc[device_idx[0], 'category'] = classify_device(data['device_type'])
+        
+        if 'check_out_date' in data:
+            check_out_epoch = to_epoch(data['check_out_date'])
+            devices_df.loc[device_idx[0], 'check_out_date'] = to_iso(check_out_epoch) if check_out_epoch is not None else ''
+            devices_df.loc[device_idx[0], 'check_out_epoch'] = check_out_epoch
+        
         devices_df.loc[device_idx[0], 'last_updated'] = get_current_timestamp()
-        devices_df.to_csv(DEVICES_FILE, index=False)
+        save_devices(devices_df)
         
+        track_checkout(devices_df.loc[device_idx[0]])
         add_history_record(device_id, data.get('updated_by', 'system'), 'device_updated')
+        publish_device_event('device_updated', devices_df.loc[device_idx[0]])
         
-        return jsonify(devices_df.loc[device_idx[0]].to_dict())
+        return jsonify(device_record(devices_df.loc[device_idx[0]]))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/devices/<device_id>/checkout', methods=['PUT'])
+@serialized_write
 def checkout_device(device_id):
     try:
         data = request.get_json()
         if 'user' not in data:
             return jsonify({'error': 'User is required for checkout'}), 400
         
-        devices_df = pd.read_csv(DEVICES_FILE)
+        devices_df = pd.read_csv(g.site.devices_file)
         device_idx = devices_df[devices_df['id'] == device_id].index
         
         if len(device_idx) == 0:
@@ -192,22 +462,27 @@ def checkout_device(device_id):
         # Update device
         devices_df.loc[device_idx[0], 'assigned_user'] = data['user']
         devices_df.loc[device_idx[0], 'status'] = 'checked_out'
-        devices_df.loc[device_idx[0], 'check_out_date'] = get_current_timestamp()
+        check_out_epoch = time.time()
+        devices_df.loc[device_idx[0], 'check_out_date'] = to_iso(check_out_epoch)
+        devices_df.loc[device_idx[0], 'check_out_epoch'] = check_out_epoch
         devices_df.loc[device_idx[0], 'usage_count'] = device['usage_count'] + 1
         devices_df.loc[device_idx[0], 'last_updated'] = get_current_timestamp()
         
-        devices_df.to_csv(DEVICES_FILE, index=False)
+        save_devices(devices_df)
         
+        track_checkout(devices_df.loc[device_idx[0]])
         add_history_record(device_id, data['user'], 'device_checked_out')
+        publish_device_event('device_checked_out', devices_df.loc[device_idx[0]])
         
-        return jsonify(devices_df.loc[device_idx[0]].to_dict())
+        return jsonify(device_record(devices_df.loc[device_idx[0]]))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/devices/<device_id>/checkin', methods=['PUT'])
+@serialized_write
 def checkin_device(device_id):
     try:
-        devices_df = pd.read_csv(DEVICES_FILE)
+        devices_df = pd.read_csv(g.site.devices_file)
         device_idx = devices_df[devices_df['id'] == device_id].index
         
         if len(device_idx) == 0:
@@ -221,24 +496,31 @@ def checkin_device(device_id):
         devices_df.loc[device_idx[0], 'assigned_user'] = ''
         devices_df.loc[device_idx[0], 'status'] = 'available'
         devices_df.loc[device_idx[0], 'check_out_date'] = ''
+        devices_df.loc[device_idx[0], 'check_out_epoch'] = None
         devices_df.loc[device_idx[0], 'last_updated'] = get_current_timestamp()
         
-        devices_df.to_csv(DEVICES_FILE, index=False)
+        save_devices(devices_df)
         
+        track_checkout(devices_df.loc[device_idx[0]])
         add_history_record(device_id, device['assigned_user'], 'device_checked_in')
+        publish_device_event('device_checked_in', devices_df.loc[device_idx[0]])
         
-        return jsonify(devices_df.loc[device_idx[0]].to_dict())
+        return jsonify(device_record(devices_df.loc[device_idx[0]]))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/devices/recommendations', methods=['GET'])
+@rate_limited(*RECOMMENDATIONS_RATE_LIMIT)
 def get_device_recommendations():
     try:
-        devices_df = pd.read_csv(DEVICES_FILE)
+        snapshot = read_snapshot()
+        if snapshot is None:
+            return snapshot_expired()
+        devices_df = snapshot.devices.df
         
         # Filter for devices with low usage or old OS
-        low_usage = devices_df[devices_df['usage_count'] < 5]
-        old_os = devices_df[devices_df['os_version'].str.contains('old|legacy|deprecated', case=False, na=False)]
+        low_usage = devices_df[pd.to_numeric(devices_df['usage_count'], errors='coerce') < 5]
+        old_os = devices_df[store.contains(devices_df['os_version'], 'old|legacy|deprecated')]
         
         # Combine and remove duplicates
         recommendations = pd.concat([low_usage, old_os]).drop_duplicates(subset=['id'])
@@ -247,16 +529,176 @@ def get_device_recommendations():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    try:
+        snapshot = read_snapshot()
+        if snapshot is None:
+            return snapshot_expired()
+        devices_df = snapshot.devices.df
+        users_df = snapshot.users.df
+        return jsonify({
+            'snapshot': snapshot.version,
+            'total_devices': len(devices_df),
+            'devices_by_status': devices_df['status'].value_counts().to_dict(),
+            'devices_by_category': {
+                category: len(rows) for category, rows in snapshot.devices.by_category.items()
+            },
+            'total_users': len(users_df),
+            'users_by_department': {
+                department: len(rows) for department, rows in snapshot.users.by_department.items()
+            }
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/snapshot', methods=['GET'])
+def get_snapshot():
+    """Current snapshot version, for pinning a session's reads with X-Snapshot"""
+    try:
+        snapshot = read_snapshot()
+        if snapshot is None:
+            return snapshot_expired()
+        return jsonify({'version': snapshot.version})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Live status push (Server-Sent Events)
+@app.route('/events', methods=['GET'])
+def device_events():
+    response = Response(stream_with_context(g.site.hub.stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/metrics/startup', methods=['GET'])
+def startup_metrics_view():
+    return jsonify(startup_metrics)
+
+# Export endpoints
+EXPORT_DEVICE_FILTERS = ['status', 'category', 'connectivity', 'assigned_user']
+EXPORT_HISTORY_FILTERS = ['device_id', 'user', 'action']
+
+def export_response(path, name, filter_chunk):
+    export_format = request.args.get('format', 'csv')
+    if export_format not in exporter.FORMATS:
+        return jsonify({'error': f'Unsupported export format: {export_format}'}), 400
+    if export_format == 'parquet':
+        if not exporter.parquet_available():
+            return jsonify({'error': 'Parquet export requires pyarrow'}), 400
+        body = exporter.stream_parquet(path, filter_chunk)
+    else:
+        body = exporter.stream_csv(path, filter_chunk)
+    response = Response(body, mimetype=exporter.FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{export_format}'
+    return response
+
+def column_filter(columns):
+    """Chunk filter keeping rows whose columns equal the matching query args"""
+    filters = {column: request.args[column] for column in columns if request.args.get(column)}
+    
+    def filter_chunk(chunk):
+        for column, value in filters.items():
+            chunk = chunk[chunk[column].astype(str) == value]
+        return chunk
+    return filter_chunk
+
+def local_time(timestamp):
+    """Naive local time for a timestamp, as history records are written (tz-aware ones are converted)"""
+    if pd.isna(timestamp) or timestamp.tzinfo is None:
+        return timestamp
+    return pd.Timestamp(timestamp.to_pydatetime().astimezone()).tz_localize(None)
+
+@app.route('/export/devices', methods=['GET'])
+def export_devices():
+    try:
+        return export_response(g.site.devices_file, 'devices', column_filter(EXPORT_DEVICE_FILTERS))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/export/history', methods=['GET'])
+def export_history():
+    try:
+        try:
+            since = local_time(pd.Timestamp(request.args['since'])) if request.args.get('since') else None
+            until = local_time(pd.Timestamp(request.args['until'])) if request.args.get('until') else None
+        except ValueError:
+            return jsonify({'error': 'since/until must be ISO dates'}), 400
+        match_columns = column_filter(EXPORT_HISTORY_FILTERS)
+        
+        def filter_chunk(chunk):
+            chunk = match_columns(chunk)
+            if since is not None or until is not None:
+                timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce')
+                if not pd.api.types.is_datetime64_dtype(timestamps):
+                    # Some rows carry a UTC offset; convert row by row
+                    timestamps = pd.to_datetime(chunk['timestamp'].map(
+                        lambda value: local_time(pd.to_datetime(value, errors='coerce'))
+                    ))
+                if since is not None:
+                    chunk = chunk[timestamps >= since]
+                    timestamps = timestamps[timestamps >= since]
+                if until is not None:
+                    chunk = chunk[timestamps < until]
+            return chunk
+        return export_response(g.site.history_file, 'history', filter_chunk)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # User endpoints
 @app.route('/users', methods=['GET'])
 def get_users():
     try:
-        users_df = pd.read_csv(USERS_FILE)
-        return jsonify(users_df.to_dict('records'))
+        snapshot = read_snapshot()
+        if snapshot is None:
+            return snapshot_expired()
+        table = snapshot.users
+        users_df = store.filter_users(
+            table,
+            department=request.args.get('department'),
+            status=request.args.get('status')
+        )
+        records = _reads.do((request.full_path, id(table)), lambda: users_df.to_dict('records'))
+        return jsonify(records)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/users/by-department', methods=['GET'])
+def get_users_by_department():
+    try:
+        snapshot = read_snapshot()
+        if snapshot is None:
+            return snapshot_expired()
+        table = snapshot.users
+        status = request.args.get('status')
+        grouped = {}
+        for department in table.by_department:
+            users_df = store.filter_users(table, department=department, status=status)
+            if not users_df.empty:
+                grouped[department] = users_df.to_dict('records')
+        return jsonify(grouped)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/users/<user_id>/devices', methods=['GET'])
+def get_user_devices(user_id):
+    try:
+        snapshot = read_snapshot()
+        if snapshot is None:
+            return snapshot_expired()
+        users = snapshot.users
+        if user_id not in users.by_id:
+            return jsonify({'error': 'User not found'}), 404
+        user = users.df.iloc[users.by_id[user_id]]
+        
+        # Devices are assigned by name or email, so look up both in this snapshot's index
+        user_devices = store.devices_for_users(snapshot.devices, user['name'], user['email'])
+        return jsonify(user_devices.to_dict('records'))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/users', methods=['POST'])
+@serialized_write
 def add_user():
     try:
         data = request.get_json()
@@ -267,7 +709,7 @@ def add_user():
             if field not in data or not data[field]:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        users_df = pd.read_csv(USERS_FILE)
+        users_df = pd.read_csv(g.site.users_file)
         
         # Check for duplicate email
         if not users_df.empty and data['email'] in users_df['email'].values:
@@ -285,7 +727,7 @@ def add_user():
         }
         
         users_df = pd.concat([users_df, pd.DataFrame([new_user])], ignore_index=True)
-        users_df.to_csv(USERS_FILE, index=False)
+        save_users(users_df)
         
         return jsonify(new_user), 201
     except Exception as e:
@@ -295,7 +737,7 @@ def add_user():
 @app.route('/history/<device_id>', methods=['GET'])
 def get_device_history(device_id):
     try:
-        history_df = pd.read_csv(HISTORY_FILE)
+        history_df = pd.read_csv(g.site.history_file)
         device_history = history_df[history_df['device_id'] == device_id]
         
         # Sort by timestamp (newest first)
@@ -306,5 +748,6 @@ def get_device_history(device_id):
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    initialize_csv_files()
-    app.run(debug=True, host='localhost', port=5002) 
\ No newline at end of file
+    sites.release(sites.get(DEFAULT_SITE))
+    start_overdue_sweeper()
+    app.run(debug=True, host=HOST, port=PORT, threaded=True) 
\ No newline at end of file
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for dictionary-encoded device columns in the store.
+
+Builds a synthetic devices table, then compares the plain (object column)
+table with the encoded one used by store.py: memory footprint, an equality
+filter, a case-insensitive search and a group-by count.
+
+Usage:
+    python benchmark_store.py [rows]   # default 100000
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import store
+
+DEVICE_TYPES = ['iPhone 14', 'iPhone 15 Pro', 'iPad Air', 'Galaxy S23', 'Pixel 8', 'MacBook Pro 14',
+                'Lenovo ThinkPad X1', 'OnePlus 11', 'Galaxy Tab S9', 'Dell Latitude 7440']
+OS_VERSIONS = ['iOS 16.5', 'iOS 17.1', 'Android 13', 'Android 14', 'macOS 14', 'Windows 11', 'legacy 9']
+STATUSES = ['available', 'checked_out', 'maintenance']
+CONNECTIVITY = ['WiFi', 'Cellular', 'Ethernet']
+
+
+def make_devices(rows):
+    rng = np.random.default_rng(0)
+
+    def pick(values):
+        # One string object per row, as read_csv produces, rather than shared list entries
+        return [''.join(values[i]) for i in rng.integers(0, len(values), rows)]
+
+    return pd.DataFrame({
+        'id': [f"device-{i}" for i in range(rows)],
+        'device_type': pick(DEVICE_TYPES),
+        'connectivity': pick(CONNECTIVITY),
+        'serial_number': [f"SN{i:08d}" for i in range(rows)],
+        'os_version': pick(OS_VERSIONS),
+        'assigned_user': '',
+        'status': pick(STATUSES),
+        'usage_count': rng.integers(0, 20, rows),
+        'category': '',
+    })
+
+
+def best_of(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    plain = make_devices(rows)
+    encoded = store._build_device_table(plain.copy()).df
+    columns = [column for column in store.ENCODED_DEVICE_COLUMNS if column in plain.columns]
+
+    print(f"📊 {rows:,} devices, encoded columns: {', '.join(columns)}")
+    plain_mb = plain[columns].memory_usage(deep=True, index=False).sum() / 1e6
+    encoded_mb = encoded[columns].memory_usage(deep=True, index=False).sum() / 1e6
+    print(f"  memory              plain {plain_mb:8.2f} MB   encoded {encoded_mb:8.2f} MB   ({plain_mb / encoded_mb:.1f}x)")
+
+    cases = [
+        ('status filter', lambda df: df[df['status'] == 'available']),
+        ('search os_version', lambda df: df[store.contains(df['os_version'], 'android')]),
+        ('search device_type', lambda df: df[store.contains(df['device_type'], 'galaxy')]),
+        ('group-by status', lambda df: df.groupby('status', observed=True).size()),
+    ]
+    for name, case in cases:
+        plain_ms = best_of(lambda: case(plain)) * 1000
+        encoded_ms = best_of(lambda: case(encoded)) * 1000
+        print(f"  {name:<20}plain {plain_ms:8.2f} ms   encoded {encoded_ms:8.2f} ms   ({plain_ms / encoded_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Device category classification shared by the API and the import scripts.
+
+All keywords are compiled into a single regex alternation, so a device type is
+scanned once; when several keywords match, the category listed first wins.
+"""
+
+import re
+from functools import lru_cache
+
+# Keyword tables, in priority order
+CATEGORY_KEYWORDS = [
+    ('iPad', ['ipad']),
+    ('iPhone', ['iphone']),
+    ('Android Phone', ['android', 'galaxy', 'samsung', 'pixel', 'google', 'motorola',
+                       'oneplus', 'nokia', 'oppo', 'redmi', 'tcl', 'fold', 'flip']),
+    ('Laptop', ['laptop', 'macbook']),
+    ('Desktop', ['desktop', 'pc']),
+    # Vendor names alone (e.g. "Lenovo ThinkPad") usually mean a laptop
+    ('Laptop', ['dell', 'hp', 'lenovo', 'acer', 'asus']),
+]
+CATEGORIES = list(dict.fromkeys(category for category, _ in CATEGORY_KEYWORDS))
+
+# Phone-like devices the keywords don't recognise are shown as Android phones
+DEFAULT_CATEGORY = 'Android Phone'
+
+_KEYWORD_PRIORITY = {
+    keyword: priority
+    for priority, (_, keywords) in enumerate(CATEGORY_KEYWORDS)
+    for keyword in keywords
+}
+# Longest keywords first so overlapping alternatives resolve to the most specific one
+_KEYWORD_RE = re.compile('|'.join(
+    re.escape(keyword) for keyword in sorted(_KEYWORD_PRIORITY, key=len, reverse=True)
+))
+
+
+@lru_cache(maxsize=4096)
+def _classify(lowered):
+    priorities = [_KEYWORD_PRIORITY[match] for match in _KEYWORD_RE.findall(lowered)]
+    if not priorities:
+        return None
+    return CATEGORY_KEYWORDS[min(priorities)][0]
+
+
+def classify_device(device_type, default=DEFAULT_CATEGORY):
+    """Return the category for a device type string"""
+    if not isinstance(device_type, str):
+        return default
+    category = _classify(device_type.lower())
+    return category if category is not None else default
+
+
+def classify_series(device_types, default=DEFAULT_CATEGORY):
+    """Classify a pandas Series of device types (repeated models hit the cache)"""
+    return device_types.map(lambda device_type: classify_device(device_type, default))
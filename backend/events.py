@@ -0,0 +1,85 @@
+"""
+In-process fan-out of device status changes to Server-Sent Events subscribers.
+
+Each subscriber gets a bounded queue. Publishing never blocks: if a
+subscriber's queue is full it is emptied and the subscriber is told to
+resync (refetch) instead of receiving a partial stream.
+"""
+
+import itertools
+import json
+import queue
+import threading
+
+# Events buffered per subscriber before it is considered too slow
+SUBSCRIBER_QUEUE_SIZE = 100
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+
+
+class Subscriber:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def offer(self, event):
+        with self._lock:
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                self._resync()
+
+    def _resync(self):
+        # Drop the backlog; the client refetches state instead of replaying it
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put_nowait({'type': 'resync'})
+
+
+class EventHub:
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._sequence = itertools.count(1)
+
+    def subscribe(self):
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        """Send event to every subscriber without waiting on any of them"""
+        with self._lock:
+            event = dict(event, seq=next(self._sequence))
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(event)
+
+    def stream(self):
+        """Subscribe and generate SSE frames until the client disconnects"""
+        subscriber = self.subscribe()
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = subscriber.queue.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._subscribers)
+
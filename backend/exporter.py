@@ -0,0 +1,93 @@
+"""
+Streaming CSV/Parquet export straight from the CSV store.
+
+Files are read in fixed-size chunks and each chunk is filtered and encoded
+before the next one is read, so memory use does not grow with the file.
+Parquet output needs the optional pyarrow package.
+"""
+
+import io
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+CHUNK_SIZE = 10000
+FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _filtered_chunks(path, filter_chunk, chunk_size):
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        if filter_chunk is not None:
+            chunk = filter_chunk(chunk)
+        yield chunk
+
+
+def stream_csv(path, filter_chunk=None, chunk_size=CHUNK_SIZE):
+    """Yield the filtered rows of path as CSV text, one chunk at a time"""
+    header = True
+    for chunk in _filtered_chunks(path, filter_chunk, chunk_size):
+        if chunk.empty and not header:
+            continue
+        yield chunk.to_csv(index=False, header=header)
+        header = False
+    if header:
+        # Empty file: still emit the header row
+        yield ','.join(pd.read_csv(path, nrows=0).columns) + '\n'
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every row group"""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def stream_parquet(path, filter_chunk=None, chunk_size=CHUNK_SIZE):
+    """Yield the filtered rows of path as a Parquet file, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    try:
+        for chunk in _filtered_chunks(path, filter_chunk, chunk_size):
+            # All columns as strings so every row group shares one schema
+            table = pa.Table.from_pandas(chunk.astype('string'), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table)
+            yield sink.drain()
+        if writer is None:
+            # Empty file: still emit a valid Parquet file with the columns
+            columns = pd.read_csv(path, nrows=0).columns
+            table = pa.table({column: pa.array([], pa.string()) for column in columns})
+            writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
@@ -7,6 +7,11 @@ import pandas as pd
 import uuid
 from datetime import datetime
 
+from categorize import classify_series
+
+# Tablets and desktops are not part of this import
+MOBILE_AND_LAPTOP_CATEGORIES = ['iPhone', 'Android Phone', 'Laptop']
+
 def fix_import():
     excel_file = "/Users/ysara563/Desktop/2025 Mobile Inventory.xlsx"
     
@@ -22,11 +27,8 @@ def fix_import():
         print(df.head(3))
         
         # Filter for mobile and laptops only
-        mobile_keywords = ['iphone', 'android', 'pixel', 'samsung', 'galaxy', 'motorola', 'oneplus', 'oppo', 'redmi', 'nokia', 'tcl', 'google']
-        laptop_keywords = ['macbook', 'laptop', 'dell', 'hp', 'lenovo', 'acer', 'asus']
-        
-        # Create filter mask
-        device_filter = df['Device\xa0'].str.lower().str.contains('|'.join(mobile_keywords + laptop_keywords), na=False)
+        categories = classify_series(df['Device\xa0'], default='')
+        device_filter = categories.isin(MOBILE_AND_LAPTOP_CATEGORIES)
         filtered_df = df[device_filter]
         
         print(f"\n📱 Filtered for mobile and laptops: {len(filtered_df)} devices")
@@ -36,6 +38,7 @@ def fix_import():
         
         # Map columns correctly using the actual column names
         new_df['device_type'] = filtered_df['Device\xa0']
+        new_df['category'] = categories[device_filter]
         new_df['serial_number'] = filtered_df['Serial Number']
         new_df['os_version'] = filtered_df['Android/iOS Version ']
         new_df['connectivity'] = filtered_df['Wifi/Cellular']
@@ -0,0 +1,16 @@
+"""
+gunicorn settings for serving many idle /events streams: python -m gunicorn app:app
+
+The gevent worker holds each open stream in a greenlet instead of an OS thread.
+"""
+
+bind = 'localhost:5002'
+worker_class = 'gevent'
+worker_connections = 10000
+# Sites, caches and event hubs live in process memory, so all requests must share one worker
+workers = 1
+
+
+def post_worker_init(worker):
+    import app
+    app.start_background_tasks()
@@ -8,6 +8,8 @@ import pandas as pd
 import os
 import sys
 
+from categorize import classify_series
+
 def import_excel_to_csv():
     print("📊 Excel to CSV Import Tool")
     print("=" * 50)
@@ -53,6 +55,7 @@ def import_excel_to_csv():
         new_df['device_type'] = df[device_type_col]
         new_df['serial_number'] = df[serial_col]
         new_df['os_version'] = df[os_col]
+        new_df['category'] = classify_series(new_df['device_type'])
         
         # Optional fields with defaults
         new_df['connectivity'] = df[connectivity_col] if connectivity_col else 'WiFi'
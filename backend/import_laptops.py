@@ -3,6 +3,8 @@ import uuid
 from datetime import datetime
 import os
 
+from categorize import classify_device
+
 def import_laptops():
     """Import laptop data from the second sheet of the Excel file"""
     
@@ -51,7 +53,8 @@ def import_laptops():
             'check_out_date': datetime.now().strftime('%Y-%m-%d') if assigned_user else None,
             'usage_count': 1 if assigned_user else 0,
             'created_at': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
-            'last_updated': datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+            'last_updated': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+            'category': classify_device(device_type)
         }
         
         # Check if this device already exists (by serial number)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Parallel import pipeline for large inventory spreadsheets.
+
+Workbook sheets are parsed and normalized (device category, status,
+assigned user) one sheet per worker process; CSV input is streamed in row
+chunks that the workers normalize in vectorized batches. Each row is parsed
+once, and only normalized records travel back to the parent. The results
+are merged through serial-number deduplication into devices.csv /
+users.csv. Rows without a serial number get a placeholder
+serial derived from device type, assigned user and OS version, so
+re-importing the same file does not duplicate them.
+
+Usage:
+    python import_pipeline.py <workbook.xlsx|file.csv> [--workers N] [--chunk-size N] [--site KEY]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import store
+from categorize import classify_series
+from sites import DEFAULT_SITE, SITES_DIR, valid_site_key
+
+DEVICES_FILE = 'devices.csv'
+USERS_FILE = 'users.csv'
+
+DEVICE_COLUMNS = [
+    'id', 'device_type', 'connectivity', 'serial_number', 'os_version',
+    'assigned_user', 'status', 'usage_count', 'check_out_date',
+    'created_at', 'last_updated', 'category', 'check_out_epoch'
+]
+
+# Source column layouts of the inventory workbook, mapped to our CSV format
+MOBILE_SHEET_COLUMNS = {
+    'Device\xa0': 'device_type',
+    'Serial Number': 'serial_number',
+    'Android/iOS Version ': 'os_version',
+    'Wifi/Cellular': 'connectivity',
+    'Tester': 'assigned_user',
+}
+LAPTOP_SHEET_COLUMNS = {
+    'Device Model': 'device_type',
+    'Serial #': 'serial_number',
+    'Laptop Configuration \xa0 (OS)': 'os_version',
+    'Full Name': 'assigned_user',
+}
+
+# Keyword table, checked in order (first match wins)
+DEPARTMENT_KEYWORDS = [
+    ('Development', ['dev', 'development', 'engineer']),
+    ('QA', ['test', 'qa', 'quality']),
+    ('Management', ['manager', 'lead']),
+]
+
+
+def _import_sheet(path, sheet_name):
+    """Parse one sheet once and normalize it (runs in a worker process)"""
+    return normalize_chunk(pd.read_excel(path, sheet_name=sheet_name))
+
+
+def _normalized_chunks(pool, path, chunk_size):
+    """Submit the input to the pool; yields futures of normalized DataFrames"""
+    if path.lower().endswith('.csv'):
+        # The parent streams the file once and ships each chunk to a worker
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            yield pool.submit(normalize_chunk, chunk)
+    else:
+        # One task per sheet: xlsx readers can't seek to a row range, so splitting
+        # a sheet would make every worker parse the rows before its range
+        for sheet_name in pd.ExcelFile(path).sheet_names:
+            yield pool.submit(_import_sheet, path, sheet_name)
+
+
+def _map_columns(df):
+    """Rename a raw sheet to our column names based on its layout"""
+    if 'Device Model' in df.columns:
+        df = df[df['Device Model'].notna()].copy()
+        # Laptop sheet: prefix the model with MacBook/Laptop from the Type column
+        kind = df.get('Type(Mac, Lenovo)', pd.Series('', index=df.index)).astype(str).str.lower()
+        prefix = kind.str.contains('mac', na=False).map({True: 'MacBook ', False: 'Laptop '})
+        df['Device Model'] = prefix + df['Device Model'].astype(str).str.strip()
+        mapping = LAPTOP_SHEET_COLUMNS
+    elif 'Device\xa0' in df.columns:
+        mapping = MOBILE_SHEET_COLUMNS
+    else:
+        mapping = {col: col for col in DEVICE_COLUMNS}
+    present = {src: dst for src, dst in mapping.items() if src in df.columns}
+    return df[list(present)].rename(columns=present)
+
+
+def normalize_chunk(chunk):
+    """Normalize a chunk of raw rows into device records (runs in a worker process)"""
+    df = _map_columns(chunk)
+    for col in ['device_type', 'serial_number', 'os_version', 'connectivity', 'assigned_user']:
+        if col not in df.columns:
+            df[col] = ''
+    df = df.fillna('')
+    for col in ['device_type', 'serial_number', 'os_version', 'connectivity', 'assigned_user']:
+        df[col] = df[col].astype(str).str.strip()
+
+    # Keep recognised devices only
+    df['category'] = classify_series(df['device_type'], default='')
+    df = df[df['category'] != '']
+
+    assigned = df['assigned_user'] != ''
+    imported_at = datetime.now()
+    now = imported_at.isoformat()
+    df['status'] = np.where(assigned, 'checked_out', 'available')
+    df['usage_count'] = assigned.astype(int)
+    df['check_out_date'] = np.where(assigned, now, '')
+    df['check_out_epoch'] = np.where(assigned, imported_at.timestamp(), np.nan)
+    df['connectivity'] = df['connectivity'].replace('', 'WiFi')
+    df['created_at'] = now
+    df['last_updated'] = now
+    return df
+
+
+def extract_users(devices_df, existing_names):
+    """Derive user records from assigned users, as in import_users.py, in one batch"""
+    names = devices_df['assigned_user']
+    names = names[names != ''].drop_duplicates()
+    clean = names.str.split('(').str[0].str.strip()
+    raw_lower = names.str.lower()
+
+    users = pd.DataFrame({'name': clean.values, 'raw': raw_lower.values})
+    users = users[(users['name'] != '') & ~users['name'].isin(existing_names)]
+    users = users.drop_duplicates(subset=['name'])
+
+    conditions = [
+        users['raw'].str.contains('|'.join(keywords), regex=True)
+        for _, keywords in DEPARTMENT_KEYWORDS
+    ]
+    choices = [department for department, _ in DEPARTMENT_KEYWORDS]
+    users['department'] = np.select(conditions, choices, default='QA')
+    users['email'] = users['name'].str.lower().str.replace(' ', '.', regex=False) + '@company.com'
+    users['id'] = [str(uuid.uuid4()) for _ in range(len(users))]
+    users['role'] = 'viewer'
+    users['status'] = 'active'
+    users['join_date'] = datetime.now().strftime('%Y-%m-%d')
+    return users[['id', 'name', 'email', 'department', 'role', 'status', 'join_date']]
+
+
+def placeholder_serials(df):
+    """Stable serial numbers for rows without one, from device type, assigned user and OS version"""
+    keys = df['device_type'].str.lower() + '|' + df['assigned_user'].str.lower() + '|' + df['os_version'].str.lower()
+    return keys.map(lambda key: 'IMP-' + hashlib.sha1(key.encode()).hexdigest()[:10].upper())
+
+
+def run_pipeline(path, workers=None, chunk_size=5000, devices_file=DEVICES_FILE, users_file=USERS_FILE):
+    """Parse, normalize and merge a workbook into the CSV store; returns (new_devices_df, new_users_df)"""
+    workers = workers or os.cpu_count() or 1
+
+    # Stages 1 and 2: parse each sheet (or the CSV stream) once, normalize in parallel
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = list(_normalized_chunks(pool, path, chunk_size))
+        normalized = [future.result() for future in futures]
+
+    if normalized:
+        imported = pd.concat(normalized, ignore_index=True)
+    else:
+        imported = pd.DataFrame(columns=DEVICE_COLUMNS)
+
+    # Stage 3: merge through serial-number dedup (within the import and against the store)
+    if os.path.exists(devices_file):
+        existing_df = pd.read_csv(devices_file)
+    else:
+        existing_df = pd.DataFrame(columns=DEVICE_COLUMNS)
+    existing_serials = set(existing_df['serial_number'].dropna().astype(str))
+
+    missing = imported['serial_number'] == ''
+    if missing.any():
+        imported.loc[missing, 'serial_number'] = placeholder_serials(imported[missing])
+    imported = imported.drop_duplicates(subset=['serial_number'])
+    imported = imported[~imported['serial_number'].isin(existing_serials)].copy()
+    imported['id'] = [str(uuid.uuid4()) for _ in range(len(imported))]
+
+    devices_df = pd.concat([existing_df, imported[DEVICE_COLUMNS]], ignore_index=True)
+    store.write_csv(devices_file, devices_df)
+
+    if os.path.exists(users_file):
+        users_df = pd.read_csv(users_file)
+    else:
+        users_df = pd.DataFrame(columns=['id', 'name', 'email', 'department', 'role', 'status', 'join_date'])
+    new_users = extract_users(imported, set(users_df['name'].dropna()))
+    if len(new_users):
+        store.write_csv(users_file, pd.concat([users_df, new_users], ignore_index=True))
+
+    return imported, new_users
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Parallel spreadsheet import for the device inventory')
+    arg_parser.add_argument('path', help='Excel workbook or CSV file to import')
+    arg_parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    arg_parser.add_argument('--chunk-size', type=int, default=5000, help='rows per normalization batch (CSV input)')
+    arg_parser.add_argument('--site', default=None, help='import into this site instead of the default one')
+    args = arg_parser.parse_args()
+
+    directory = ''
+    if args.site and args.site != DEFAULT_SITE:
+        if not valid_site_key(args.site):
+            print(f"❌ Invalid site: {args.site}")
+            sys.exit(1)
+        directory = os.path.join(SITES_DIR, args.site)
+        os.makedirs(directory, exist_ok=True)
+
+    if not os.path.exists(args.path):
+        print(f"❌ File not found: {args.path}")
+        sys.exit(1)
+
+    print(f"📖 Importing {args.path} with {args.workers or os.cpu_count()} workers")
+    start = time.perf_counter()
+    try:
+        devices, users = run_pipeline(
+            args.path, workers=args.workers, chunk_size=args.chunk_size,
+            devices_file=os.path.join(directory, DEVICES_FILE),
+            users_file=os.path.join(directory, USERS_FILE),
+        )
+    except Exception as e:
+        print(f"❌ Error importing data: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Imported {len(devices)} new devices and {len(users)} new users in {elapsed:.2f}s")
+    if len(devices):
+        print(devices['category'].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
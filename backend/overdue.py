@@ -0,0 +1,144 @@
+"""
+Overdue checkout detection.
+
+Check-out times are normalized to epoch seconds (`check_out_epoch`) and kept
+in a min-heap of (epoch, device_id) for checked-out devices. Updates are
+O(log n); finding the k devices checked out before a cutoff walks only the
+part of the heap above the cutoff, so it is O(k) rather than a fleet scan.
+Checked-in devices are removed lazily and the heap is compacted when stale
+entries pile up.
+"""
+
+import heapq
+import re
+import threading
+from datetime import datetime
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+# Devices checked out longer than this are flagged by the sweeper
+OVERDUE_AFTER_SECONDS = 14 * 24 * 3600
+# Seconds between sweeps
+SWEEP_INTERVAL = 300
+
+_DURATION_RE = re.compile(r'^(\d+(?:\.\d+)?)([smhdw]?)$')
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400, '': 86400}
+
+
+def parse_duration(value):
+    """Parse '90s', '12h', '7d', '2w' (a bare number means days) into seconds"""
+    match = _DURATION_RE.match(value.strip().lower())
+    if not match:
+        raise ValueError(f'Invalid duration: {value}')
+    return float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def to_epoch(value):
+    """Epoch seconds for a check-out date in any format dateutil understands (None if blank/invalid)"""
+    if isinstance(value, (int, float)):
+        return None if pd.isna(value) else float(value)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    from dateutil import parser
+    try:
+        return parser.parse(value).timestamp()
+    except (ValueError, OverflowError):
+        return None
+
+
+def to_iso(epoch):
+    return datetime.fromtimestamp(epoch).isoformat()
+
+
+class OverdueIndex:
+    """Min-heap of check-out times for the checked-out devices of one devices file"""
+
+    def __init__(self):
+        self.key = None
+        self._lock = threading.Lock()
+        self._heap = []
+        self._epochs = {}
+        self._flagged = set()
+
+    def rebuild(self, devices_df):
+        checked_out = devices_df[devices_df['status'] == 'checked_out']
+        if 'check_out_epoch' in checked_out.columns:
+            epochs = pd.to_numeric(checked_out['check_out_epoch'], errors='coerce')
+        else:
+            epochs = pd.Series(float('nan'), index=checked_out.index)
+        # Rows written by the legacy import scripts only have check_out_date
+        missing = epochs.isna()
+        if missing.any():
+            epochs = epochs.astype(object)
+            epochs[missing] = checked_out.loc[missing, 'check_out_date'].map(to_epoch)
+        with self._lock:
+            self._epochs = {
+                device_id: float(epoch)
+                for device_id, epoch in zip(checked_out['id'], epochs)
+                if pd.notna(epoch)
+            }
+            self._heap = [(epoch, device_id) for device_id, epoch in self._epochs.items()]
+            heapq.heapify(self._heap)
+            self._flagged.clear()
+
+    def carry_over(self, previous):
+        """Keep the flags of devices still out since the checkout `previous` already announced"""
+        with previous._lock:
+            flagged = {
+                device_id for device_id in previous._flagged
+                if device_id in previous._epochs
+            }
+            epochs = {device_id: previous._epochs[device_id] for device_id in flagged}
+        with self._lock:
+            self._flagged = {
+                device_id for device_id in flagged
+                if self._epochs.get(device_id) == epochs[device_id]
+            }
+
+    def track(self, device_id, epoch):
+        """Record device_id as checked out at epoch, or None once it is checked in"""
+        with self._lock:
+            self._flagged.discard(device_id)
+            if epoch is None:
+                self._epochs.pop(device_id, None)
+            else:
+                self._epochs[device_id] = epoch
+                heapq.heappush(self._heap, (epoch, device_id))
+            if len(self._heap) > 2 * len(self._epochs) + 64:
+                self._heap = [(epoch, device_id) for device_id, epoch in self._epochs.items()]
+                heapq.heapify(self._heap)
+
+    def _older_than(self, cutoff):
+        # Walk the heap as a tree; a node at or after the cutoff has no qualifying children
+        found = {}
+        stack = [0]
+        heap = self._heap
+        while stack:
+            position = stack.pop()
+            if position >= len(heap):
+                continue
+            epoch, device_id = heap[position]
+            if epoch >= cutoff:
+                continue
+            if self._epochs.get(device_id) == epoch:
+                found[device_id] = epoch
+            stack.append(2 * position + 1)
+            stack.append(2 * position + 2)
+        return sorted(found.items(), key=lambda item: (item[1], item[0]))
+
+    def older_than(self, cutoff):
+        """(device_id, epoch) pairs checked out before cutoff, oldest first (ties by device id)"""
+        with self._lock:
+            return self._older_than(cutoff)
+
+    def flag_overdue(self, cutoff):
+        """Like older_than, but only devices not flagged since their checkout; marks them"""
+        with self._lock:
+            newly_overdue = [
+                (device_id, epoch) for device_id, epoch in self._older_than(cutoff)
+                if device_id not in self._flagged
+            ]
+            self._flagged.update(device_id for device_id, _ in newly_overdue)
+            return newly_overdue
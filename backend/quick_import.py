@@ -7,6 +7,8 @@ import pandas as pd
 import uuid
 from datetime import datetime
 
+from categorize import classify_series
+
 def quick_import():
     excel_file = "/Users/ysara563/Desktop/2025 Mobile Inventory.xlsx"
     
@@ -67,6 +69,7 @@ def quick_import():
         new_df['device_type'] = df[device_type_col]
         new_df['serial_number'] = df[serial_col]
         new_df['os_version'] = df[os_col]
+        new_df['category'] = classify_series(new_df['device_type'])
         
         # Optional fields with defaults
         new_df['connectivity'] = 'WiFi'  # Default
@@ -1,12 +1,38 @@
 #!/usr/bin/env python3
 """
 Startup script for Device Inventory Manager Backend
-This script will install dependencies and start the Flask server
+This script will install dependencies (only if needed) and start the Flask server
+
+Usage:
+    python run.py             # skip pip when requirements.txt is already satisfied
+    python run.py --install   # always run pip install first
 """
 
+import time
+
+# Measured from here; reported as time-to-first-request by GET /metrics/startup
+START_TIME = time.time()
+
 import subprocess
 import sys
 import os
+from importlib import metadata
+
+def requirements_satisfied(requirements_file="requirements.txt"):
+    """Check pinned requirements against installed package metadata (no imports)"""
+    with open(requirements_file) as f:
+        for line in f:
+            requirement = line.split('#')[0].strip()
+            if not requirement:
+                continue
+            name, _, version = requirement.partition('==')
+            try:
+                installed = metadata.version(name.strip())
+            except metadata.PackageNotFoundError:
+                return False
+            if version and installed != version.strip():
+                return False
+    return True
 
 def install_dependencies():
     """Install required packages"""
@@ -20,15 +46,18 @@ def install_dependencies():
     return True
 
 def start_server():
-    """Start the Flask server"""
+    """Start the Flask server in this process"""
+    import app
+    
+    app.startup_metrics['started_at'] = START_TIME
     print("🚀 Starting Flask server...")
-    print("📍 Server will be available at: http://localhost:5000")
+    print(f"📍 Server will be available at: http://{app.HOST}:{app.PORT}")
     print("📖 API documentation available in README.md")
     print("🧪 Run 'python test_api.py' to test the API")
     print("\n" + "=" * 50)
     
     try:
-        subprocess.run([sys.executable, "app.py"])
+        app.serve()
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")
     except Exception as e:
@@ -43,8 +72,11 @@ if __name__ == "__main__":
         print("❌ Error: app.py not found. Make sure you're in the backend directory.")
         sys.exit(1)
     
-    # Install dependencies
-    if install_dependencies():
+    # Install dependencies only when something is missing or out of date
+    if "--install" not in sys.argv and requirements_satisfied():
+        print("✅ Dependencies already satisfied")
+        start_server()
+    elif install_dependencies():
         # Start the server
         start_server()
     else:
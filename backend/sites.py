@@ -0,0 +1,186 @@
+"""
+Per-site partitioning of the inventory.
+
+Each site (tenant) has its own CSV files, read caches, indexes and event hub.
+A site exists once its directory does (import_pipeline.py --site creates
+it); requests for other keys are refused rather than creating a tenant.
+Sites are loaded on first access and the least recently used ones are evicted
+once there are too many or they sit idle, so memory follows the active sites.
+A site is never evicted while a request holds it, so its write lock and
+caches stay the only ones for its files. The default site keeps using the CSV
+files in the working directory.
+
+Reads go through immutable snapshots: a Snapshot pairs one version of the
+device table with one version of the user table. Writers replace the CSV
+files atomically (under the site's write lock) and the next read publishes a
+new snapshot; recent snapshots are retained so a client can pin a sequence of
+reads to the same version.
+"""
+
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import store
+from events import EventHub
+from throttle import SingleFlight
+
+SITE_HEADER = 'X-Site'
+DEFAULT_SITE = 'default'
+SITES_DIR = 'sites'
+
+MAX_ACTIVE_SITES = 32
+SITE_IDLE_SECONDS = 30 * 60
+# Snapshot versions kept per site for pinned reads
+RETAINED_SNAPSHOTS = 32
+
+Snapshot = namedtuple('Snapshot', ['version', 'devices', 'users'])
+
+_SITE_KEY_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Snapshot versions are unique across sites, reloads and (by starting from the
+# clock) restarts, so a stale pin gets 410 instead of matching a newer snapshot
+_versions = itertools.count(int(time.time() * 1000))
+
+
+class UnknownSite(LookupError):
+    """No site directory exists for the key (sites are created by import_pipeline.py --site)"""
+
+
+def valid_site_key(key):
+    return bool(_SITE_KEY_RE.match(key))
+
+
+class Site:
+    def __init__(self, key, directory, devices_file, users_file, history_file):
+        self.key = key
+        self.directory = directory
+        self.devices_file = os.path.join(directory, devices_file)
+        self.users_file = os.path.join(directory, users_file)
+        self.history_file = os.path.join(directory, history_file)
+        self.hub = EventHub()
+        self.last_used = time.monotonic()
+        # Requests holding the site (see SiteRegistry.get/release); held sites aren't evicted
+        self.in_flight = 0
+        # Serializes read-modify-write handlers; readers never take it
+        self.write_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._current = None
+        self._snapshots = OrderedDict()
+
+    def snapshot(self, version=None):
+        """Current snapshot, or the retained snapshot `version` (None if it has expired)"""
+        if version is not None:
+            return self._snapshots.get(version)
+        current = self._current
+        devices = store.load_devices(self.devices_file)
+        users = store.load_users(self.users_file)
+        if current is not None and current.devices is devices and current.users is users:
+            return current
+        return self._publish(devices, users)
+
+    def _publish(self, devices, users):
+        with self._snapshot_lock:
+            current = self._current
+            if current is not None:
+                if current.devices is devices and current.users is users:
+                    return current
+                # A slower reader may arrive with tables older than the published ones
+                if (devices.mtime_ns < current.devices.mtime_ns
+                        or users.mtime_ns < current.users.mtime_ns):
+                    return current
+            snapshot = Snapshot(next(_versions), devices, users)
+            self._snapshots[snapshot.version] = snapshot
+            while len(self._snapshots) > RETAINED_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+            self._current = snapshot
+            return snapshot
+
+    def unload(self):
+        """Drop this site's cached tables and indexes"""
+        for path in (self.devices_file, self.users_file, self.history_file):
+            store.evict(path)
+
+
+class SiteRegistry:
+    """LRU of loaded sites; `initialize` creates or backfills a site's files when it is loaded"""
+
+    def __init__(self, initialize, devices_file, users_file, history_file,
+                 max_active=MAX_ACTIVE_SITES, idle_seconds=SITE_IDLE_SECONDS):
+        self._initialize = initialize
+        self._file_names = (devices_file, users_file, history_file)
+        self.max_active = max_active
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._sites = OrderedDict()
+        self._loads = SingleFlight()
+
+    def get(self, key):
+        """Return the Site for key, loading it if it isn't active; raises UnknownSite
+
+        The site is held (never evicted) until it is passed to release().
+        """
+        while True:
+            with self._lock:
+                site = self._sites.get(key)
+                if site is not None:
+                    self._sites.move_to_end(key)
+                    site.last_used = time.monotonic()
+                    site.in_flight += 1
+                    evicted = self._evict()
+            if site is not None:
+                for old_site in evicted:
+                    old_site.unload()
+                return site
+            # Load (shared by concurrent callers), then take a hold on the loaded site
+            self._loads.do(key, lambda: self._load(key))
+
+    def acquire(self, site):
+        """Hold an already loaded site; False if it has been unloaded"""
+        with self._lock:
+            if self._sites.get(site.key) is not site:
+                return False
+            site.in_flight += 1
+            return True
+
+    def release(self, site):
+        with self._lock:
+            site.in_flight -= 1
+
+    def _load(self, key):
+        directory = '' if key == DEFAULT_SITE else os.path.join(SITES_DIR, key)
+        if directory and not os.path.isdir(directory):
+            raise UnknownSite(key)
+        site = Site(key, directory, *self._file_names)
+        self._initialize(site)
+        with self._lock:
+            self._sites[key] = site
+            evicted = self._evict()
+        for old_site in evicted:
+            old_site.unload()
+
+    def _evict(self):
+        """Pick sites to unload (LRU first); sites serving requests or event streams are kept
+
+        The most recently used site is the one being returned, so it is never picked.
+        """
+        now = time.monotonic()
+        evicted = []
+        for key, site in list(self._sites.items())[:-1]:
+            over_capacity = len(self._sites) > self.max_active
+            idle = now - site.last_used > self.idle_seconds
+            if not (over_capacity or idle):
+                break
+            if site.in_flight or len(site.hub):
+                continue
+            del self._sites[key]
+            evicted.append(site)
+        return evicted
+
+    def active(self):
+        """Loaded sites, without refreshing their LRU position"""
+        with self._lock:
+            return list(self._sites.values())
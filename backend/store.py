@@ -0,0 +1,216 @@
+"""
+Read-through caches of the device and user tables with secondary indexes.
+
+A CSV is only re-parsed when it changes on disk (or a writer invalidates it);
+filters on indexed columns are then a dictionary lookup instead of a scan.
+Each device table version carries an assignee -> rows index, so resolving a
+user's devices costs O(devices held) and answers from the same snapshot as
+every other read.
+
+Low-cardinality device columns are dictionary-encoded (pandas categoricals:
+integer codes plus one shared dictionary of values), so a cached table holds
+each distinct string once and filters/group-bys work on the codes.
+"""
+
+import os
+import stat
+import tempfile
+import threading
+from collections import namedtuple
+
+from lazy_imports import lazy_import
+from throttle import SingleFlight
+
+pd = lazy_import('pandas')
+
+# mtime_ns is the modification time of the file version the table was read from
+DeviceTable = namedtuple('DeviceTable', ['df', 'by_category', 'by_id', 'by_assignee', 'mtime_ns'], defaults=[0])
+UserTable = namedtuple('UserTable', ['df', 'by_id', 'by_department', 'by_status', 'mtime_ns'], defaults=[0])
+
+# Device columns with a handful of distinct values, stored as categoricals
+ENCODED_DEVICE_COLUMNS = ['status', 'connectivity', 'device_type', 'os_version', 'category']
+
+# Process umask, applied to files write_csv creates (os.umask can only be read by setting it)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+_lock = threading.Lock()
+_cache = {}
+# Concurrent cache misses for the same file version share one parse
+_loads = SingleFlight()
+
+
+def _stat_key(path):
+    file_stat = os.stat(path)
+    return (file_stat.st_mtime_ns, file_stat.st_size)
+
+
+def _group_positions(df, column):
+    return dict(df.groupby(column, observed=True).indices.items())
+
+
+def _build_device_table(devices_df):
+    devices_df = devices_df.fillna('')
+    if 'category' not in devices_df.columns:
+        devices_df['category'] = ''
+    for column in ENCODED_DEVICE_COLUMNS:
+        if column in devices_df.columns:
+            devices_df[column] = devices_df[column].astype('category')
+    by_id = {device_id: position for position, device_id in enumerate(devices_df['id'])}
+    # Assignees keyed with user_key, so 'John Smith (dev)' is found under 'john smith'
+    assignees = devices_df['assigned_user'].map(user_key).astype(object)
+    by_assignee = dict(assignees.groupby(assignees).indices)
+    by_assignee.pop('', None)
+    return DeviceTable(devices_df, _group_positions(devices_df, 'category'), by_id, by_assignee)
+
+
+def _build_user_table(users_df):
+    users_df = users_df.fillna('')
+    by_id = {user_id: position for position, user_id in enumerate(users_df['id'])}
+    return UserTable(
+        users_df, by_id,
+        _group_positions(users_df, 'department'),
+        _group_positions(users_df, 'status'),
+    )
+
+
+def _load(path, build):
+    key = _stat_key(path)
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    def parse():
+        table = build(pd.read_csv(path))._replace(mtime_ns=key[0])
+        with _lock:
+            _cache[path] = (key, table)
+        return table
+    return _loads.do((path, key), parse)
+
+
+def load_devices(path):
+    """Return the cached DeviceTable for path, re-reading the CSV only if it changed"""
+    return _load(path, _build_device_table)
+
+
+def load_users(path):
+    """Return the cached UserTable for path, re-reading the CSV only if it changed"""
+    return _load(path, _build_user_table)
+
+
+def _file_mode(path):
+    """Permissions for a rewrite of path: keep the existing file's, else the default for new files"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def write_csv(path, df):
+    """Write df to path atomically, so readers see either the old or the new file"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.csv')
+    try:
+        # mkstemp creates the file owner-only
+        os.chmod(tmp_path, _file_mode(path))
+        with os.fdopen(fd, 'w', newline='') as f:
+            df.to_csv(f, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def invalidate(path):
+    """Drop the cached table for path (call after writing the file)"""
+    with _lock:
+        _cache.pop(path, None)
+
+
+def evict(path):
+    """Drop everything held in memory for path (cached table and indexes)"""
+    with _lock:
+        _cache.pop(path, None)
+        for index_key in [index_key for index_key in _indexes if index_key[0] == path]:
+            del _indexes[index_key]
+
+
+def contains(column, pattern):
+    """Case-insensitive regex match on a column; encoded columns match each distinct value once"""
+    pattern = pattern.lower()
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        matched = column.cat.categories.astype(str).str.lower().str.contains(pattern, na=False)
+        codes = column.cat.codes.to_numpy()
+        # Code -1 (missing) must not wrap around to the last category
+        return pd.Series((codes >= 0) & matched[codes], index=column.index)
+    return column.astype(str).str.lower().str.contains(pattern, na=False)
+
+
+def filter_by_category(table, category):
+    """Rows of table in the given category, via the category index"""
+    return table.df.iloc[table.by_category.get(category, [])]
+
+
+def devices_for_users(table, *users):
+    """Rows of the device table assigned to any of users (names or emails, see user_key)"""
+    positions = set()
+    for user in users:
+        if user and user_key(user):
+            positions.update(table.by_assignee.get(user_key(user), []))
+    return table.df.iloc[sorted(positions)]
+
+
+def filter_users(table, department=None, status=None):
+    """Users matching the given department and/or status, via the indexes"""
+    positions = None
+    for index, value in ((table.by_department, department), (table.by_status, status)):
+        if value:
+            matches = set(index.get(value, []))
+            positions = matches if positions is None else positions & matches
+    if positions is None:
+        return table.df
+    return table.df.iloc[sorted(positions)]
+
+
+def user_key(user):
+    """Match key for an assigned user: 'John Smith (dev)' and 'john smith' are the same user
+
+    Strips the parenthetical note as import_users.py does when creating user records.
+    """
+    return str(user).split('(')[0].strip().lower()
+
+
+# Indexes maintained incrementally by the mutation handlers, per (path, index class)
+_indexes = {}
+
+
+def maintained_index(path, index_class):
+    """Return the index_class index over path, rebuilding it only after external writes
+
+    index_class needs a `key` attribute and a `rebuild(devices_df)` method. An
+    optional `carry_over(previous)` method keeps state that isn't derived from
+    the file (it is called on the rebuilt index with the stale one).
+    """
+    key = _stat_key(path)
+    with _lock:
+        previous = _indexes.get((path, index_class))
+        if previous is not None and previous.key == key:
+            return previous
+    index = index_class()
+    index.rebuild(pd.read_csv(path))
+    if previous is not None and hasattr(index, 'carry_over'):
+        index.carry_over(previous)
+    index.key = key
+    with _lock:
+        _indexes[(path, index_class)] = index
+    return index
+
+
+def update_index(path, index_class, apply):
+    """Apply one change to a loaded index after the handler has written path"""
+    with _lock:
+        index = _indexes.get((path, index_class))
+        if index is None:
+            return
+        apply(index)
+        index.key = _stat_key(path)
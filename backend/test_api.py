@@ -116,7 +116,62 @@ def test_api():
         print(f"✅ Found {len(users)} users")
     else:
         print(f"❌ Failed to get users: {response.text}")
-    
+
+    # Test 10: Filter devices by category
+    print("\n10. Filtering devices by category...")
+    response = requests.get(f"{BASE_URL}/devices", params={"category": device['category']})
+    if response.status_code == 200 and any(d['id'] == device_id for d in response.json()):
+        print(f"✅ Found {len(response.json())} {device['category']} devices")
+    else:
+        print(f"❌ Category filter failed: {response.text}")
+
+    # Test 11: Get a user's devices
+    print("\n11. Getting devices assigned to the user...")
+    requests.put(f"{BASE_URL}/devices/{device_id}/checkout", json={"user": user['email']})
+    response = requests.get(f"{BASE_URL}/users/{user['id']}/devices")
+    if response.status_code == 200 and [d['id'] for d in response.json()] == [device_id]:
+        print(f"✅ {user['name']} holds {len(response.json())} device(s)")
+    else:
+        print(f"❌ Failed to get user devices: {response.text}")
+    requests.put(f"{BASE_URL}/devices/{device_id}/checkin")
+
+    # Test 12: Pinned snapshot reads
+    print("\n12. Reading stats from a pinned snapshot...")
+    response = requests.get(f"{BASE_URL}/stats")
+    if response.status_code == 200:
+        snapshot = response.headers['X-Snapshot']
+        pinned = requests.get(f"{BASE_URL}/devices", headers={"X-Snapshot": snapshot})
+        if pinned.status_code == 200 and pinned.headers['X-Snapshot'] == snapshot:
+            print(f"✅ Snapshot {snapshot}: {response.json()['total_devices']} devices")
+        else:
+            print(f"❌ Pinned read failed: {pinned.status_code} {pinned.text}")
+    else:
+        print(f"❌ Failed to get stats: {response.text}")
+
+    # Test 13: Overdue devices
+    print("\n13. Getting overdue devices...")
+    response = requests.get(f"{BASE_URL}/devices/overdue", params={"older_than": "7d"})
+    if response.status_code == 200:
+        print(f"✅ Found {len(response.json())} overdue devices")
+    else:
+        print(f"❌ Failed to get overdue devices: {response.text}")
+
+    # Test 14: Export devices
+    print("\n14. Exporting devices as CSV...")
+    response = requests.get(f"{BASE_URL}/export/devices", params={"category": device['category']})
+    if response.status_code == 200 and device['serial_number'] in response.text:
+        print(f"✅ Exported {len(response.text.splitlines()) - 1} rows")
+    else:
+        print(f"❌ Export failed: {response.text}")
+
+    # Test 15: Startup metrics
+    print("\n15. Getting startup metrics...")
+    response = requests.get(f"{BASE_URL}/metrics/startup")
+    if response.status_code == 200:
+        print(f"✅ Ready after {response.json()['ready_seconds']}s")
+    else:
+        print(f"❌ Failed to get startup metrics: {response.text}")
+
     print("\n" + "=" * 50)
     print("🎉 API testing completed!")
 
@@ -0,0 +1,34 @@
+"""
+Tests for backfilling derived device columns at site load (app.backfill_devices)
+
+Run with: python -m pytest test_backfill.py
+"""
+
+import os
+
+import pandas as pd
+
+import app
+from sites import Site
+
+
+def test_backfill_rewrites_only_when_something_was_filled_in(tmp_path):
+    site = Site('test', str(tmp_path), 'devices.csv', 'users.csv', 'history.csv')
+    pd.DataFrame({
+        'id': ['d1', 'd2'],
+        'device_type': ['iPhone 14', 'Pixel 7'],
+        'assigned_user': ['Ann', 'Bob'],
+        'status': ['checked_out', 'checked_out'],
+        'check_out_date': ['2024-01-01', 'not a date'],
+    }).to_csv(site.devices_file, index=False)
+
+    app.backfill_devices(site)
+    devices = pd.read_csv(site.devices_file)
+    assert list(devices['category']) == ['iPhone', 'Android Phone']
+    assert devices['check_out_epoch'][0] == pd.Timestamp('2024-01-01').to_pydatetime().timestamp()
+    assert pd.isna(devices['check_out_epoch'][1])
+
+    # The unparseable date stays blank without rewriting the file on every load
+    mtime_ns = os.stat(site.devices_file).st_mtime_ns
+    app.backfill_devices(site)
+    assert os.stat(site.devices_file).st_mtime_ns == mtime_ns
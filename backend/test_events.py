@@ -0,0 +1,95 @@
+"""
+Tests for device status fan-out to Server-Sent Events subscribers (events.py)
+
+Run with: python -m pytest test_events.py
+"""
+
+import json
+import threading
+
+import events
+from events import EventHub
+
+
+def drain(subscriber):
+    items = []
+    while not subscriber.queue.empty():
+        items.append(subscriber.queue.get_nowait())
+    return items
+
+
+def test_subscriber_queues_are_bounded():
+    hub = EventHub(queue_size=3)
+    subscriber = hub.subscribe()
+    for device_id in ['d1', 'd2', 'd3']:
+        hub.publish({'type': 'device_updated', 'id': device_id})
+    assert subscriber.queue.full()
+    assert [event['id'] for event in drain(subscriber)] == ['d1', 'd2', 'd3']
+
+
+def test_overflow_replaces_the_backlog_with_a_single_resync():
+    hub = EventHub(queue_size=3)
+    subscriber = hub.subscribe()
+    for i in range(10):
+        hub.publish({'type': 'device_updated', 'id': f'd{i}'})
+    # Overflow at d3 leaves [resync, d4, d5]; d6 overflows again, and so on
+    assert [event['type'] for event in drain(subscriber)] == ['resync']
+
+    # Once drained, the next overflow again yields exactly one resync
+    for i in range(10, 14):
+        hub.publish({'type': 'device_updated', 'id': f'd{i}'})
+    assert [event['type'] for event in drain(subscriber)] == ['resync']
+
+
+def test_publish_does_not_block_on_a_full_subscriber():
+    hub = EventHub(queue_size=1)
+    stalled = hub.subscribe()
+    reader = hub.subscribe()
+    stalled.queue.put_nowait({'type': 'device_updated'})
+
+    publisher = threading.Thread(target=lambda: [hub.publish({'type': 'device_updated'}) for _ in range(1000)])
+    publisher.start()
+    publisher.join(5)
+    assert not publisher.is_alive()
+    # The full subscriber did not hold back the others
+    assert reader.queue.qsize() == 1
+    assert [event['type'] for event in drain(stalled)] == ['resync']
+
+
+def test_events_carry_increasing_sequence_numbers():
+    hub = EventHub()
+    first = hub.subscribe()
+    hub.publish({'type': 'device_created', 'id': 'd1'})
+    second = hub.subscribe()
+    hub.publish({'type': 'device_checked_out', 'id': 'd1'})
+    hub.publish({'type': 'device_checked_in', 'id': 'd1'})
+
+    assert [event['seq'] for event in drain(first)] == [1, 2, 3]
+    # Subscribers share one sequence, so a late subscriber can spot what it missed
+    assert [event['seq'] for event in drain(second)] == [2, 3]
+
+
+def test_stream_frames_events_and_sends_keep_alives(monkeypatch):
+    monkeypatch.setattr(events, 'HEARTBEAT_INTERVAL', 0.01)
+    hub = EventHub()
+    stream = hub.stream()
+    assert next(stream) == 'retry: 3000\n\n'
+    assert next(stream) == ': keep-alive\n\n'
+
+    hub.publish({'type': 'device_checked_out', 'id': 'd1'})
+    frame = next(stream)
+    event_line, data_line, _, _ = frame.split('\n')
+    assert event_line == 'event: device_checked_out'
+    assert json.loads(data_line[len('data: '):]) == {'type': 'device_checked_out', 'id': 'd1', 'seq': 1}
+    stream.close()
+
+
+def test_stream_unsubscribes_when_the_client_disconnects():
+    hub = EventHub()
+    stream = hub.stream()
+    next(stream)
+    assert len(hub) == 1
+    # The WSGI server closes the response generator when the client goes away
+    stream.close()
+    assert len(hub) == 0
+    hub.publish({'type': 'device_updated', 'id': 'd1'})
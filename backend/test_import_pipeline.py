@@ -0,0 +1,77 @@
+"""
+Tests for the parallel import pipeline (import_pipeline.py)
+
+Run with: python -m pytest test_import_pipeline.py
+"""
+
+import pandas as pd
+
+from import_pipeline import normalize_chunk, placeholder_serials, run_pipeline
+
+MOBILE_COLUMNS = ['Device\xa0', 'Serial Number', 'Android/iOS Version ', 'Wifi/Cellular', 'Tester']
+
+
+def mobile_sheet(rows):
+    return pd.DataFrame(rows, columns=MOBILE_COLUMNS)
+
+
+def test_normalize_chunk_maps_mobile_sheet_and_drops_unknown_devices():
+    df = normalize_chunk(mobile_sheet([
+        ['iPhone 14 ', 'S1', 'iOS 17', 'Cellular', 'John Smith (dev)'],
+        ['Pixel 8', 'S2', 'Android 14', None, None],
+        ['Monitor', 'S3', '', '', ''],
+    ]))
+    assert list(df['serial_number']) == ['S1', 'S2']
+    assert list(df['device_type']) == ['iPhone 14', 'Pixel 8']
+    assert list(df['category']) == ['iPhone', 'Android Phone']
+    assert list(df['status']) == ['checked_out', 'available']
+    assert list(df['usage_count']) == [1, 0]
+    assert list(df['connectivity']) == ['Cellular', 'WiFi']
+    assert df['check_out_epoch'].notna().tolist() == [True, False]
+
+
+def test_normalize_chunk_prefixes_laptop_models():
+    df = normalize_chunk(pd.DataFrame({
+        'Device Model': ['Pro 14', 'ThinkPad X1', None],
+        'Serial #': ['L1', 'L2', 'L3'],
+        'Laptop Configuration \xa0 (OS)': ['macOS', 'Windows 11', ''],
+        'Full Name': ['Bob', '', ''],
+        'Type(Mac, Lenovo)': ['Mac', 'Lenovo', ''],
+    }))
+    assert list(df['device_type']) == ['MacBook Pro 14', 'Laptop ThinkPad X1']
+    assert list(df['category']) == ['Laptop', 'Laptop']
+
+
+def test_placeholder_serials_are_stable_and_case_insensitive():
+    df = pd.DataFrame({
+        'device_type': ['MacBook Pro', 'macbook pro', 'MacBook Pro'],
+        'assigned_user': ['Bob', 'BOB', 'Ann'],
+        'os_version': ['macOS', 'MACOS', 'macOS'],
+    })
+    serials = placeholder_serials(df)
+    assert serials.iloc[0] == serials.iloc[1] != serials.iloc[2]
+    assert serials.iloc[0].startswith('IMP-')
+    assert list(placeholder_serials(df)) == list(serials)
+
+
+def test_run_pipeline_dedups_by_serial_against_the_import_and_the_store(tmp_path):
+    source = str(tmp_path / 'inventory.csv')
+    devices_file = str(tmp_path / 'devices.csv')
+    users_file = str(tmp_path / 'users.csv')
+    mobile_sheet([
+        ['iPhone 14', 'S1', 'iOS 17', 'WiFi', 'John Smith (dev)'],
+        ['iPhone 14', 'S1', 'iOS 17', 'WiFi', 'John Smith (dev)'],
+        ['Pixel 8', 'S2', 'Android 14', 'WiFi', ''],
+        ['MacBook Pro', None, 'macOS', '', 'Ann (qa)'],
+    ]).to_csv(source, index=False)
+
+    devices, users = run_pipeline(source, workers=2, chunk_size=2, devices_file=devices_file, users_file=users_file)
+    assert sorted(devices['serial_number'].str[:4]) == ['IMP-', 'S1', 'S2']
+    assert sorted(users['name']) == ['Ann', 'John Smith']
+
+    # Importing the same file again adds nothing, including the serial-less row
+    devices, users = run_pipeline(source, workers=2, chunk_size=2, devices_file=devices_file, users_file=users_file)
+    assert len(devices) == 0 and len(users) == 0
+    stored = pd.read_csv(devices_file)
+    assert len(stored) == 3
+    assert stored['id'].is_unique
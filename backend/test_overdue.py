@@ -0,0 +1,150 @@
+"""
+Tests for overdue checkout detection (overdue.py)
+
+Run with: python -m pytest test_overdue.py
+"""
+
+import random
+
+import pandas as pd
+import pytest
+
+import store
+from overdue import OverdueIndex, parse_duration, to_epoch
+
+
+def devices(rows):
+    """Devices frame from (id, status, check_out_date, check_out_epoch) tuples"""
+    return pd.DataFrame(rows, columns=['id', 'status', 'check_out_date', 'check_out_epoch'])
+
+
+def index_of(epochs):
+    index = OverdueIndex()
+    index.rebuild(devices([
+        (device_id, 'checked_out', '', epoch) for device_id, epoch in epochs.items()
+    ]))
+    return index
+
+
+def brute_force(epochs, cutoff):
+    return sorted(
+        ((device_id, epoch) for device_id, epoch in epochs.items() if epoch < cutoff),
+        key=lambda item: (item[1], item[0]),
+    )
+
+
+def test_parse_duration():
+    assert parse_duration('90s') == 90
+    assert parse_duration('12h') == 12 * 3600
+    assert parse_duration('2w') == 14 * 86400
+    assert parse_duration('7') == 7 * 86400
+    with pytest.raises(ValueError):
+        parse_duration('soon')
+
+
+def test_to_epoch_handles_blank_and_invalid_dates():
+    assert to_epoch('') is None
+    assert to_epoch('not a date') is None
+    assert to_epoch(float('nan')) is None
+    assert to_epoch(12.5) == 12.5
+    assert to_epoch('2024-01-01T00:00:00') == pd.Timestamp('2024-01-01').to_pydatetime().timestamp()
+
+
+def test_rebuild_tracks_only_checked_out_devices():
+    index = OverdueIndex()
+    index.rebuild(devices([
+        ('d1', 'checked_out', '', 100.0),
+        ('d2', 'available', '', 50.0),
+        ('d3', 'checked_out', '', float('nan')),
+    ]))
+    assert index.older_than(1000) == [('d1', 100.0)]
+
+
+def test_rebuild_falls_back_to_check_out_date_without_epoch():
+    # Rows added by the legacy import scripts have a date but no check_out_epoch
+    index = OverdueIndex()
+    index.rebuild(devices([
+        ('d1', 'checked_out', '2024-01-01', float('nan')),
+        ('d2', 'checked_out', '', float('nan')),
+        ('d3', 'checked_out', '2024-02-01', 10.0),
+    ]))
+    assert [device_id for device_id, _ in index.older_than(pd.Timestamp('2025-01-01').timestamp())] == ['d3', 'd1']
+
+    legacy = OverdueIndex()
+    legacy.rebuild(devices([('d1', 'checked_out', '2024-01-01', 0)]).drop(columns=['check_out_epoch']))
+    assert [device_id for device_id, _ in legacy.older_than(pd.Timestamp('2025-01-01').timestamp())] == ['d1']
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_older_than_matches_a_full_scan(seed):
+    rng = random.Random(seed)
+    epochs = {f'd{i}': float(rng.randrange(10000)) for i in range(500)}
+    index = index_of(epochs)
+    for cutoff in [0, 1, 2500, 5000, 9999, 20000]:
+        assert index.older_than(cutoff) == brute_force(epochs, cutoff)
+
+
+def test_track_updates_and_lazy_deletion_match_a_full_scan():
+    rng = random.Random(42)
+    epochs = {f'd{i}': float(rng.randrange(10000)) for i in range(200)}
+    index = index_of(epochs)
+    for _ in range(2000):
+        device_id = f'd{rng.randrange(300)}'
+        if rng.random() < 0.4:
+            epochs.pop(device_id, None)
+            index.track(device_id, None)
+        else:
+            epochs[device_id] = float(rng.randrange(10000))
+            index.track(device_id, epochs[device_id])
+        # Compaction keeps stale heap entries bounded
+        assert len(index._heap) <= 2 * len(index._epochs) + 64
+    for cutoff in [0, 3000, 10000]:
+        assert index.older_than(cutoff) == brute_force(epochs, cutoff)
+
+
+def test_checkin_and_recheckout_replace_the_old_entry():
+    index = index_of({'d1': 100.0})
+    index.track('d1', None)
+    assert index.older_than(1000) == []
+    index.track('d1', 500.0)
+    assert index.older_than(1000) == [('d1', 500.0)]
+    assert index.older_than(200) == []
+
+
+def test_flag_overdue_reports_each_checkout_once():
+    index = index_of({'d1': 100.0, 'd2': 200.0})
+    assert index.flag_overdue(150) == [('d1', 100.0)]
+    assert index.flag_overdue(1000) == [('d2', 200.0)]
+    assert index.flag_overdue(1000) == []
+
+    # A new checkout is announced again
+    index.track('d1', 300.0)
+    assert index.flag_overdue(1000) == [('d1', 300.0)]
+
+
+def test_carry_over_keeps_flags_for_the_same_checkout():
+    previous = index_of({'d1': 100.0, 'd2': 200.0, 'd3': 300.0})
+    previous.flag_overdue(1000)
+
+    # After an external write: d1 unchanged, d2 checked out again, d3 checked in
+    rebuilt = index_of({'d1': 100.0, 'd2': 250.0, 'd4': 50.0})
+    rebuilt.carry_over(previous)
+    assert rebuilt.flag_overdue(1000) == [('d4', 50.0), ('d2', 250.0)]
+
+
+def test_maintained_index_keeps_flags_across_external_writes(tmp_path):
+    path = str(tmp_path / 'devices.csv')
+    devices([('d1', 'checked_out', '', 100.0)]).to_csv(path, index=False)
+    index = store.maintained_index(path, OverdueIndex)
+    assert index.flag_overdue(1000) == [('d1', 100.0)]
+
+    devices([
+        ('d1', 'checked_out', '', 100.0),
+        ('d2', 'checked_out', '2024-01-01', float('nan')),
+    ]).to_csv(path, index=False)
+    rebuilt = store.maintained_index(path, OverdueIndex)
+    try:
+        assert rebuilt is not index
+        assert [device_id for device_id, _ in rebuilt.flag_overdue(pd.Timestamp('2025-01-01').timestamp())] == ['d2']
+    finally:
+        store.evict(path)
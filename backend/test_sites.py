@@ -0,0 +1,177 @@
+"""
+Tests for snapshot publishing and site loading (sites.py) and atomic CSV writes (store.py)
+
+Run with: python -m pytest test_sites.py
+"""
+
+import os
+import stat
+
+import pandas as pd
+import pytest
+
+import sites
+import store
+from sites import RETAINED_SNAPSHOTS, Site, SiteRegistry, UnknownSite
+
+DEVICE_COLUMNS = ['id', 'device_type', 'assigned_user', 'status', 'category']
+USER_COLUMNS = ['id', 'name', 'email', 'department', 'status']
+
+
+def write_devices(path, ids):
+    store.write_csv(path, pd.DataFrame(
+        [[device_id, 'iPhone 14', '', 'available', 'iPhone'] for device_id in ids],
+        columns=DEVICE_COLUMNS,
+    ))
+    store.invalidate(path)
+
+
+def write_users(path, names):
+    store.write_csv(path, pd.DataFrame(
+        [[name, name, f'{name}@company.com', 'QA', 'active'] for name in names],
+        columns=USER_COLUMNS,
+    ))
+    store.invalidate(path)
+
+
+def initialize(site):
+    if not os.path.exists(site.devices_file):
+        write_devices(site.devices_file, [])
+    if not os.path.exists(site.users_file):
+        write_users(site.users_file, [])
+
+
+@pytest.fixture
+def site(tmp_path):
+    site = Site('test', str(tmp_path), 'devices.csv', 'users.csv', 'history.csv')
+    write_devices(site.devices_file, ['d1'])
+    write_users(site.users_file, ['ann'])
+    yield site
+    site.unload()
+
+
+def bump_mtime(path, seconds):
+    file_stat = os.stat(path)
+    os.utime(path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + seconds * 10**9))
+    store.invalidate(path)
+
+
+def test_snapshot_is_reused_until_a_table_changes(site):
+    first = site.snapshot()
+    assert site.snapshot() is first
+
+    write_devices(site.devices_file, ['d1', 'd2'])
+    bump_mtime(site.devices_file, 1)
+    second = site.snapshot()
+    assert second.version > first.version
+    assert list(second.devices.df['id']) == ['d1', 'd2']
+    # The old snapshot still pairs the old tables
+    assert list(first.devices.df['id']) == ['d1']
+    assert second.users is first.users
+
+
+def test_pinned_snapshot_is_served_until_it_expires(site):
+    pinned = site.snapshot()
+    for generation in range(1, RETAINED_SNAPSHOTS + 1):
+        write_devices(site.devices_file, [f'd{generation}'])
+        bump_mtime(site.devices_file, generation)
+        site.snapshot()
+        if generation < RETAINED_SNAPSHOTS:
+            assert site.snapshot(pinned.version) is pinned
+    assert site.snapshot(pinned.version) is None
+
+
+def test_publish_refuses_tables_older_than_the_current_snapshot(site):
+    old_devices = store.load_devices(site.devices_file)
+    users = store.load_users(site.users_file)
+
+    write_devices(site.devices_file, ['d1', 'd2'])
+    bump_mtime(site.devices_file, 1)
+    current = site.snapshot()
+
+    # A slow reader that loaded the devices table before the write must not roll back
+    assert site._publish(old_devices, users) is current
+    assert site.snapshot() is current
+
+
+def test_publish_accepts_a_newer_table(site):
+    current = site.snapshot()
+    write_users(site.users_file, ['ann', 'bob'])
+    bump_mtime(site.users_file, 1)
+    newer = site._publish(current.devices, store.load_users(site.users_file))
+    assert newer.version > current.version
+    assert site.snapshot() is newer
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(sites, 'SITES_DIR', str(tmp_path))
+    for key in ['north', 'south']:
+        os.makedirs(tmp_path / key)
+    registry = SiteRegistry(initialize, 'devices.csv', 'users.csv', 'history.csv', max_active=1)
+    yield registry
+    for site in registry.active():
+        site.unload()
+
+
+def visit(registry, key):
+    """Load a site the way one request does: hold it, then release it"""
+    site = registry.get(key)
+    registry.release(site)
+    return site
+
+
+def test_unknown_sites_are_refused_without_creating_files(registry, tmp_path):
+    with pytest.raises(UnknownSite):
+        registry.get('typo-site')
+    assert not os.path.exists(tmp_path / 'typo-site')
+    assert registry.active() == []
+
+
+def test_versions_are_not_reused_after_a_site_reloads(registry):
+    first = visit(registry, 'north')
+    pinned = first.snapshot()
+    visit(registry, 'south')  # evicts north
+    assert [site.key for site in registry.active()] == ['south']
+
+    reloaded = visit(registry, 'north')
+    assert reloaded is not first
+    assert reloaded.snapshot(pinned.version) is None
+    assert reloaded.snapshot().version > pinned.version
+
+
+def test_registry_keeps_sites_with_open_event_streams(registry):
+    north = visit(registry, 'north')
+    subscriber = north.hub.subscribe()
+    visit(registry, 'south')
+    assert {site.key for site in registry.active()} == {'north', 'south'}
+    north.hub.unsubscribe(subscriber)
+
+
+def test_registry_keeps_sites_held_by_a_request(registry):
+    north = registry.get('north')
+    visit(registry, 'south')
+    # A request still holds north, so a concurrent request shares its Site (and write lock)
+    assert registry.get('north') is north
+    registry.release(north)
+    registry.release(north)
+
+    visit(registry, 'south')
+    assert [site.key for site in registry.active()] == ['south']
+    assert not registry.acquire(north)
+
+
+def test_write_csv_keeps_the_existing_file_mode(tmp_path):
+    path = str(tmp_path / 'devices.csv')
+    pd.DataFrame({'id': ['d1']}).to_csv(path, index=False)
+    os.chmod(path, 0o640)
+    store.write_csv(path, pd.DataFrame({'id': ['d1', 'd2']}))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert list(pd.read_csv(path)['id']) == ['d1', 'd2']
+
+
+def test_write_csv_creates_files_with_the_umask_mode(tmp_path):
+    path = str(tmp_path / 'users.csv')
+    store.write_csv(path, pd.DataFrame({'id': ['u1']}))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~store._UMASK
+    assert [name for name in os.listdir(tmp_path) if name.startswith('.tmp-')] == []
@@ -0,0 +1,74 @@
+"""
+Tests for the cached tables and their indexes (store.py)
+
+Run with: python -m pytest test_store.py
+"""
+
+import pandas as pd
+
+import store
+
+
+def device_table(rows):
+    """DeviceTable from (id, assigned_user, category) tuples"""
+    df = pd.DataFrame(rows, columns=['id', 'assigned_user', 'category'])
+    df['status'] = 'available'
+    return store._build_device_table(df)
+
+
+def test_user_key_strips_notes_and_case():
+    assert store.user_key('John Smith (dev)') == 'john smith'
+    assert store.user_key('  JOHN SMITH ') == 'john smith'
+    assert store.user_key('John.Smith@Company.com') == 'john.smith@company.com'
+    assert store.user_key('(contractor)') == ''
+
+
+def test_device_table_indexes_assignees_by_user_key():
+    table = device_table([
+        ('d1', 'John Smith (dev)', 'iPhone'),
+        ('d2', 'john.smith@company.com', 'Laptop'),
+        ('d3', '', 'iPhone'),
+        ('d4', None, 'iPad'),
+        ('d5', 'Ann', 'Laptop'),
+    ])
+    assert set(table.by_assignee) == {'john smith', 'john.smith@company.com', 'ann'}
+    devices = store.devices_for_users(table, 'John Smith', 'john.smith@company.com')
+    assert list(devices['id']) == ['d1', 'd2']
+    assert list(store.devices_for_users(table, 'Nobody', '')['id']) == []
+
+
+def test_an_older_table_keeps_its_own_assignments(tmp_path):
+    # Pinned reads answer from the table version they pinned, not the latest writes
+    path = str(tmp_path / 'devices.csv')
+    pd.DataFrame({'id': ['d1'], 'assigned_user': ['Ann'], 'category': ['iPhone']}).to_csv(path, index=False)
+    before = store.load_devices(path)
+    pd.DataFrame({'id': ['d1'], 'assigned_user': [''], 'category': ['iPhone']}).to_csv(path, index=False)
+    store.invalidate(path)
+    after = store.load_devices(path)
+    try:
+        assert list(store.devices_for_users(before, 'Ann')['id']) == ['d1']
+        assert list(store.devices_for_users(after, 'Ann')['id']) == []
+    finally:
+        store.evict(path)
+
+
+def test_filter_by_category_and_users():
+    table = device_table([('d1', '', 'iPhone'), ('d2', '', 'Laptop'), ('d3', '', 'iPhone')])
+    assert list(store.filter_by_category(table, 'iPhone')['id']) == ['d1', 'd3']
+    assert store.filter_by_category(table, 'Desktop').empty
+
+    users = store._build_user_table(pd.DataFrame({
+        'id': ['u1', 'u2', 'u3'],
+        'department': ['QA', 'QA', 'Development'],
+        'status': ['active', 'inactive', 'active'],
+    }))
+    assert list(store.filter_users(users, department='QA', status='active')['id']) == ['u1']
+    assert list(store.filter_users(users, status='active')['id']) == ['u1', 'u3']
+    assert len(store.filter_users(users)) == 3
+
+
+def test_contains_matches_encoded_and_plain_columns():
+    table = device_table([('d1', 'Ann', 'iPhone'), ('d2', 'Bob', 'Laptop')])
+    assert isinstance(table.df['category'].dtype, pd.CategoricalDtype)
+    assert store.contains(table.df['category'], 'PHONE').tolist() == [True, False]
+    assert store.contains(table.df['assigned_user'], 'bo').tolist() == [False, True]
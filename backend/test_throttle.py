@@ -0,0 +1,133 @@
+"""
+Tests for request coalescing and rate limiting (throttle.py)
+
+Run with: python -m pytest test_throttle.py
+"""
+
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import throttle
+from throttle import RateLimiter, SingleFlight, TokenBucket, rate_limited
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(throttle.time, 'monotonic', fake)
+    return fake
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('key', slow))) for _ in range(4)]
+    for follower in followers:
+        follower.start()
+    # Give the followers time to block on the in-flight call
+    time.sleep(0.2)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ['result'] * 5
+    assert calls == [1]
+
+
+def test_single_flight_runs_again_after_the_call_finishes():
+    flight = SingleFlight()
+    calls = []
+    assert flight.do('key', lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do('key', lambda: calls.append(1) or len(calls)) == 2
+
+
+def test_single_flight_shares_errors_and_recovers():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_single_flight_keys_are_independent():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+
+
+def test_token_bucket_allows_burst_then_reports_wait(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.take() for _ in range(3)] == [0, 0, 0]
+    assert bucket.take() == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_at_rate_up_to_burst(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.take()
+    clock.now += 0.5
+    assert bucket.take() == 0
+    assert bucket.take() > 0
+
+    clock.now += 60
+    assert [bucket.take() for _ in range(3)] == [0, 0, 0]
+    assert bucket.take() > 0
+
+
+def test_rate_limiter_tracks_clients_separately(clock):
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.take('10.0.0.1') == 0
+    assert limiter.take('10.0.0.1') > 0
+    assert limiter.take('10.0.0.2') == 0
+
+
+def test_rate_limiter_prunes_refilled_buckets(clock, monkeypatch):
+    monkeypatch.setattr(RateLimiter, 'MAX_CLIENTS', 2)
+    limiter = RateLimiter(rate=1, burst=1)
+    limiter.take('a')
+    limiter.take('b')
+    clock.now += 10
+    limiter.take('c')
+    assert set(limiter._buckets) == {'c'}
+
+
+def test_rate_limited_returns_429_with_retry_after(clock):
+    app = Flask(__name__)
+
+    @app.route('/limited')
+    @rate_limited(1, 2)
+    def limited():
+        return 'ok'
+
+    client = app.test_client()
+    assert [client.get('/limited').status_code for _ in range(2)] == [200, 200]
+    response = client.get('/limited')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
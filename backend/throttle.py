@@ -0,0 +1,108 @@
+"""
+Request coalescing and per-client rate limiting for hot read endpoints.
+"""
+
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify, request
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers for the same key share its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+
+        if not leader:
+            call['done'].wait()
+        else:
+            try:
+                call['result'] = fn()
+            except Exception as e:
+                call['error'] = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call['done'].set()
+
+        if call['error'] is not None:
+            raise call['error']
+        return call['result']
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Consume a token; returns 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token bucket per client address"""
+
+    # Buckets idle long enough to be full again are dropped past this many clients
+    MAX_CLIENTS = 10000
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, client):
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_CLIENTS:
+                    self._prune()
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            return bucket.take()
+
+    def _prune(self):
+        refill_time = self.burst / self.rate
+        now = time.monotonic()
+        self._buckets = {
+            client: bucket for client, bucket in self._buckets.items()
+            if now - bucket.updated < refill_time
+        }
+
+
+def rate_limited(rate, burst):
+    """Decorator limiting a view to `rate` requests/second per client (429 when exceeded)"""
+    limiter = RateLimiter(rate, burst)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            retry_after = limiter.take(request.remote_addr)
+            if retry_after:
+                response = jsonify({'error': 'Too many requests'})
+                response.headers['Retry-After'] = str(math.ceil(retry_after))
+                return response, 429
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
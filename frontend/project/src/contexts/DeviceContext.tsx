@@ -125,9 +125,11 @@ export const DeviceProvider: React.FC<{ children: React.ReactNode }> = ({ childr
         setError(null);
         console.log('🔄 Loading data from API...');
         
+        // Read devices and users from the same snapshot so they are consistent
+        const { version } = await apiService.getSnapshot();
         const [apiDevices, apiUsers] = await Promise.all([
-          apiService.getDevices(),
-          apiService.getUsers()
+          apiService.getDevices(undefined, version),
+          apiService.getUsers(version)
         ]);
         
         console.log('📱 Devices loaded:', apiDevices.length);
@@ -151,6 +153,28 @@ export const DeviceProvider: React.FC<{ children: React.ReactNode }> = ({ childr
     loadData();
   }, []);
 
+  // Apply live status changes pushed by the backend instead of refetching
+  useEffect(() => {
+    const unsubscribe = apiService.subscribeToDeviceEvents(async (event) => {
+      if (event.type === 'device_created' || event.type === 'resync') {
+        const apiDevices = await apiService.getDevices();
+        setDevices(apiDevices.map(convertApiDeviceToDevice));
+        return;
+      }
+      setDevices(prev => prev.map(device =>
+        device.id === event.id
+          ? {
+              ...device,
+              status: event.status as any,
+              assignedTo: event.assigned_user || undefined,
+              assignedUser: event.assigned_user || undefined,
+            }
+          : device
+      ));
+    });
+    return unsubscribe;
+  }, []);
+
   const addDevice = async (deviceData: Omit<Device, 'id'>) => {
     try {
       const apiDevice = convertDeviceToApiDevice(deviceData);
@@ -1,5 +1,6 @@
 import React, { useMemo } from 'react';
 import { useDevices } from '../contexts/DeviceContext';
+import { devicesForUser, indexDevicesByAssignee } from '../services/api';
 import {
   BarChart,
   Bar,
@@ -48,17 +49,19 @@ const AnalyticsPage: React.FC = () => {
       return acc;
     }, [] as Array<{ name: string; count: number }>);
 
-    // Department usage
+    // Department usage (group devices by assignee once instead of scanning per user)
+    const devicesByAssignee = indexDevicesByAssignee(devices);
+
     const departmentData = users.reduce((acc, user) => {
-      const userDevices = devices.filter(d => d.assignedTo === user.id);
+      const userDeviceCount = devicesForUser(devicesByAssignee, user).length;
       const existing = acc.find(item => item.department === user.department);
       if (existing) {
-        existing.devices += userDevices.length;
+        existing.devices += userDeviceCount;
         existing.users += 1;
       } else {
         acc.push({
           department: user.department,
-          devices: userDevices.length,
+          devices: userDeviceCount,
           users: 1
         });
       }
@@ -1,6 +1,7 @@
 import React from 'react';
 import { useDevices } from '../contexts/DeviceContext';
 import { useAuth } from '../contexts/AuthContext';
+import { apiService } from '../services/api';
 import { 
   Smartphone, 
   Users, 
@@ -157,12 +158,9 @@ const DashboardPage: React.FC = () => {
             title="Export CSV"
             icon={<Download className="w-full h-full" />}
             onClick={() => {
-              const csvContent = "data:text/csv;charset=utf-8," + 
-                "Name,Type,Serial,Status,Assigned To\n" +
-                devices.map(d => `${d.name},${d.type},${d.serialNumber},${d.status},${d.assignedUser || ''}`).join("\n");
-              const encodedUri = encodeURI(csvContent);
+              // The backend streams the export, so the browser never builds the whole file
               const link = document.createElement("a");
-              link.setAttribute("href", encodedUri);
+              link.setAttribute("href", apiService.getExportUrl('devices'));
               link.setAttribute("download", "devices.csv");
               document.body.appendChild(link);
               link.click();
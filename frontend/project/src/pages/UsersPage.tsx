@@ -1,6 +1,8 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useRef } from 'react';
 import { useDevices } from '../contexts/DeviceContext';
 import { useAuth } from '../contexts/AuthContext';
+import { apiService, convertApiDeviceToDevice, devicesForUser, indexDevicesByAssignee } from '../services/api';
+import { Device } from '../types';
 import { useForm } from 'react-hook-form';
 import { zodResolver } from '@hookform/resolvers/zod';
 import { z } from 'zod';
@@ -40,6 +42,8 @@ const UsersPage: React.FC = () => {
   const [showAddModal, setShowAddModal] = useState(false);
   const [showDevicesModal, setShowDevicesModal] = useState(false);
   const [selectedUserId, setSelectedUserId] = useState<string | null>(null);
+  const [selectedUserDevices, setSelectedUserDevices] = useState<Device[]>([]);
+  const requestedUserId = useRef<string | null>(null);
   const [editingUserId, setEditingUserId] = useState<string | null>(null);
   const [editFormData, setEditFormData] = useState<any>({});
 
@@ -61,16 +65,30 @@ const UsersPage: React.FC = () => {
     );
   }, [users, searchTerm]);
 
+  // Backend stores assigned_user as a name or email; group devices by it once per change
+  const devicesByAssignee = useMemo(() => indexDevicesByAssignee(devices), [devices]);
+
   const getUserDevices = (userId: string) => {
     const user = users.find(u => u.id === userId);
     if (!user) return [];
-    
-    // Match devices by user name or email since backend stores assigned_user as name/email
-    return devices.filter(device => 
-      device.assignedUser === user.name || 
-      device.assignedUser === user.email ||
-      device.assignedTo === userId
-    );
+    return devicesForUser(devicesByAssignee, user);
+  };
+
+  const showUserDevices = async (userId: string) => {
+    requestedUserId.current = userId;
+    setSelectedUserId(userId);
+    setSelectedUserDevices(getUserDevices(userId));
+    setShowDevicesModal(true);
+    try {
+      const apiDevices = await apiService.getUserDevices(userId);
+      // Ignore a slow answer for a user whose modal was already replaced
+      if (requestedUserId.current === userId) {
+        setSelectedUserDevices(apiDevices.map(convertApiDeviceToDevice));
+      }
+    } catch (err) {
+      // Keep the locally matched devices (e.g. mock data while the API is down)
+      console.error('Failed to load user devices:', err);
+    }
   };
 
   const getUserDeviceCount = (userId: string) => {
@@ -380,10 +398,7 @@ const UsersPage: React.FC = () => {
                         ) : (
                           <>
                             <button
-                              onClick={() => {
-                                setSelectedUserId(user.id);
-                                setShowDevicesModal(true);
-                              }}
+                              onClick={() => showUserDevices(user.id)}
                               className="flex items-center space-x-1 px-2 py-1 bg-gradient-to-r from-cyan-500/20 to-purple-500/20 hover:from-cyan-500/30 hover:to-purple-500/30 text-cyan-400 text-sm rounded-lg transition-all duration-200"
                             >
                               <Eye className="w-3 h-3" />
@@ -553,23 +568,23 @@ const UsersPage: React.FC = () => {
               </button>
             </div>
 
-            {getUserDevices(selectedUserId).length > 0 ? (
+            {selectedUserDevices.length > 0 ? (
               <div className="space-y-4">
                 {/* Summary Stats */}
                 <div className="grid grid-cols-3 gap-4 mb-6">
                   <div className="bg-white/5 rounded-xl p-4 text-center">
-                    <p className="text-2xl font-bold text-cyan-400">{getUserDevices(selectedUserId).length}</p>
+                    <p className="text-2xl font-bold text-cyan-400">{selectedUserDevices.length}</p>
                     <p className="text-gray-400 text-sm">Total Devices</p>
                   </div>
                   <div className="bg-white/5 rounded-xl p-4 text-center">
                     <p className="text-2xl font-bold text-green-400">
-                      {getUserDevices(selectedUserId).filter(d => d.status === 'Checked Out').length}
+                      {selectedUserDevices.filter(d => d.status === 'Checked Out').length}
                     </p>
                     <p className="text-gray-400 text-sm">Active</p>
                   </div>
                   <div className="bg-white/5 rounded-xl p-4 text-center">
                     <p className="text-2xl font-bold text-purple-400">
-                      {[...new Set(getUserDevices(selectedUserId).map(d => d.type))].length}
+                      {[...new Set(selectedUserDevices.map(d => d.type))].length}
                     </p>
                     <p className="text-gray-400 text-sm">Types</p>
                   </div>
@@ -577,7 +592,7 @@ const UsersPage: React.FC = () => {
 
                 {/* Device List */}
                 <div className="space-y-3 max-h-80 overflow-y-auto">
-                  {getUserDevices(selectedUserId).map((device) => (
+                  {selectedUserDevices.map((device) => (
                     <div key={device.id} className="bg-white/5 rounded-xl p-4 hover:bg-white/10 transition-colors">
                       <div className="flex items-start justify-between">
                         <div className="flex items-start space-x-3 flex-1">
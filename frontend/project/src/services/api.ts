@@ -1,4 +1,6 @@
 const API_BASE_URL = 'http://localhost:5002';
+// Inventory site (tenant) served by the backend; unset means the default site
+const API_SITE: string | undefined = import.meta.env.VITE_SITE;
 
 export interface ApiDevice {
   id: string;
@@ -12,6 +14,8 @@ export interface ApiDevice {
   check_out_date: string;
   created_at: string;
   last_updated: string;
+  category?: string;
+  check_out_epoch?: number | '';
 }
 
 export interface ApiUser {
@@ -32,18 +36,37 @@ export interface ApiHistory {
   timestamp: string;
 }
 
+export interface ApiDeviceEvent {
+  type: 'device_created' | 'device_updated' | 'device_checked_out' | 'device_checked_in' | 'resync';
+  id?: string;
+  status?: string;
+  assigned_user?: string;
+  last_updated?: string;
+  seq?: number;
+}
+
+const DEVICE_EVENT_TYPES: ApiDeviceEvent['type'][] = [
+  'device_created', 'device_updated', 'device_checked_out', 'device_checked_in', 'resync',
+];
+
+const snapshotHeaders = (snapshot?: number): RequestInit =>
+  snapshot === undefined ? {} : { headers: { 'X-Snapshot': String(snapshot) } };
+
 class ApiService {
   private async request<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
     const url = `${API_BASE_URL}${endpoint}`;
     console.log('🌐 API Request:', url);
     
+    // Spread the other options first so per-call headers extend the defaults instead of replacing them
+    const { headers, ...rest } = options;
     try {
       const response = await fetch(url, {
+        ...rest,
         headers: {
           'Content-Type': 'application/json',
-          ...options.headers,
+          ...(API_SITE ? { 'X-Site': API_SITE } : {}),
+          ...headers,
         },
-        ...options,
       });
 
       console.log('📡 Response status:', response.status);
@@ -64,8 +87,14 @@ class ApiService {
   }
 
   // Device endpoints
-  async getDevices(): Promise<ApiDevice[]> {
-    return this.request<ApiDevice[]>('/devices');
+  // Pass a snapshot version (from getSnapshot) to read devices and users from the same point in time
+  async getSnapshot(): Promise<{ version: number }> {
+    return this.request<{ version: number }>('/snapshot');
+  }
+
+  async getDevices(category?: string, snapshot?: number): Promise<ApiDevice[]> {
+    const query = category ? `?category=${encodeURIComponent(category)}` : '';
+    return this.request<ApiDevice[]>(`/devices${query}`, snapshotHeaders(snapshot));
   }
 
   async getDevice(id: string): Promise<ApiDevice> {
@@ -103,13 +132,23 @@ class ApiService {
     });
   }
 
+  // olderThan is a duration such as '7d', '12h' or '2w'
+  async getOverdueDevices(olderThan?: string): Promise<Array<ApiDevice & { overdue_seconds: number }>> {
+    const query = olderThan ? `?older_than=${encodeURIComponent(olderThan)}` : '';
+    return this.request<Array<ApiDevice & { overdue_seconds: number }>>(`/devices/overdue${query}`);
+  }
+
   async getDeviceRecommendations(): Promise<ApiDevice[]> {
     return this.request<ApiDevice[]>('/devices/recommendations');
   }
 
   // User endpoints
-  async getUsers(): Promise<ApiUser[]> {
-    return this.request<ApiUser[]>('/users');
+  async getUsers(snapshot?: number): Promise<ApiUser[]> {
+    return this.request<ApiUser[]>('/users', snapshotHeaders(snapshot));
+  }
+
+  async getUserDevices(userId: string): Promise<ApiDevice[]> {
+    return this.request<ApiDevice[]>(`/users/${userId}/devices`);
   }
 
   async addUser(user: Omit<ApiUser, 'id' | 'join_date'>): Promise<ApiUser> {
@@ -119,6 +158,22 @@ class ApiService {
     });
   }
 
+  // Live device status events; returns a function that closes the stream
+  subscribeToDeviceEvents(onEvent: (event: ApiDeviceEvent) => void): () => void {
+    // EventSource can't send headers, so the site goes in the query string
+    const query = API_SITE ? `?site=${encodeURIComponent(API_SITE)}` : '';
+    const source = new EventSource(`${API_BASE_URL}/events${query}`);
+    const handler = (message: MessageEvent) => onEvent(JSON.parse(message.data));
+    DEVICE_EVENT_TYPES.forEach(type => source.addEventListener(type, handler));
+    return () => source.close();
+  }
+
+  // Export endpoints (streamed by the backend; use as a download link)
+  getExportUrl(kind: 'devices' | 'history', params: Record<string, string> = {}): string {
+    const query = new URLSearchParams(API_SITE ? { ...params, site: API_SITE } : params).toString();
+    return `${API_BASE_URL}/export/${kind}${query ? `?${query}` : ''}`;
+  }
+
   // History endpoints
   async getDeviceHistory(deviceId: string): Promise<ApiHistory[]> {
     return this.request<ApiHistory[]>(`/history/${deviceId}`);
@@ -127,39 +182,40 @@ class ApiService {
 
 export const apiService = new ApiService();
 
-// Utility functions to convert between frontend and API types
-export const convertApiDeviceToDevice = (apiDevice: ApiDevice) => {
-  // Intelligently map device types to categories
-  const getDeviceCategory = (deviceType: string): string => {
-    const lowerType = deviceType.toLowerCase();
-    
-    // Mobile devices
-    if (lowerType.includes('iphone') || lowerType.includes('ipad')) {
-      return lowerType.includes('ipad') ? 'iPad' : 'iPhone';
-    }
-    if (lowerType.includes('galaxy') || lowerType.includes('samsung') || 
-        lowerType.includes('pixel') || lowerType.includes('google') ||
-        lowerType.includes('motorola') || lowerType.includes('oneplus') ||
-        lowerType.includes('nokia') || lowerType.includes('oppo') ||
-        lowerType.includes('redmi') || lowerType.includes('tcl') ||
-        lowerType.includes('fold') || lowerType.includes('flip')) {
-      return 'Android Phone';
-    }
-    
-    // Laptop/Desktop devices
-    if (lowerType.includes('laptop') || lowerType.includes('macbook') ||
-        lowerType.includes('desktop') || lowerType.includes('pc')) {
-      return lowerType.includes('laptop') || lowerType.includes('macbook') ? 'Laptop' : 'Desktop';
+// Assignee matching key, same rule as the backend's store.user_key:
+// drop a trailing "(note)", trim and lowercase, so "John Doe (QA)" matches "john doe"
+export const userKey = (value?: string) => (value || '').split('(')[0].trim().toLowerCase();
+
+// Group devices by assignee key once; look users up with devicesForUser
+export const indexDevicesByAssignee = <T extends { assignedUser?: string }>(devices: T[]) =>
+  devices.reduce((acc, device) => {
+    const key = userKey(device.assignedUser);
+    if (key) {
+      const assigned = acc.get(key);
+      if (assigned) {
+        assigned.push(device);
+      } else {
+        acc.set(key, [device]);
+      }
     }
-    
-    // Default to mobile if it's a phone-like device
-    return 'Android Phone';
-  };
+    return acc;
+  }, new Map<string, T[]>());
 
+// Devices assigned to a user by name or by email
+export const devicesForUser = <T>(byAssignee: Map<string, T[]>, user: { name: string; email: string }) => {
+  const nameKey = userKey(user.name);
+  const emailKey = userKey(user.email);
+  const byName = byAssignee.get(nameKey) || [];
+  return emailKey === nameKey ? byName : [...byName, ...(byAssignee.get(emailKey) || [])];
+};
+
+// Utility functions to convert between frontend and API types
+export const convertApiDeviceToDevice = (apiDevice: ApiDevice) => {
   return {
     id: apiDevice.id,
     name: `${apiDevice.device_type} - ${apiDevice.serial_number || 'No Serial'}`,
-    type: getDeviceCategory(apiDevice.device_type),
+    // Category is classified once by the backend when the device is written
+    type: apiDevice.category || 'Android Phone',
     serialNumber: apiDevice.serial_number || 'No Serial',
     osVersion: apiDevice.os_version,
     status: apiDevice.status as any,